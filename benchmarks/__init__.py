@@ -0,0 +1,10 @@
+"""Benchmarks for dvis
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json
+    python -m benchmarks.compare before.json after.json
+
+The individual benchmark modules (bench_import, bench_memory,
+bench_percentiles and bench_plots) can also be run on their own. Synthetic
+data are generated by benchmarks.data.
+"""
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+__doc__ = """Startup cost of importing dvis
+
+Every statement is timed in a fresh interpreter, together with the peak
+memory of that interpreter and whether the statement loaded pyplot. Run as
+
+    python -m benchmarks.bench_import [--repeat N] [--output FILE]
+
+Results are written as JSON lines.
+"""
+
+import json
+import subprocess
+import sys
+
+STATEMENTS = [
+        "import dvis",
+        "from dvis import cmix, col3",
+        "from dvis import Boxplot",
+        "from dvis import axes_grid",
+        ]
+
+_probe = """
+import resource, sys, time
+t = time.time()
+exec ( %r )
+t = time.time()-t
+print ( '%%r %%r %%r %%r' %% (t, 'matplotlib.pyplot' in sys.modules,
+    len(sys.modules), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) )
+"""
+
+def measure ( statement, repeat=5 ):
+    """Time statement in repeat fresh interpreters
+
+    :Return:
+        a dictionary with the best and median time in seconds, the peak
+        resident memory in kB, the number of loaded modules and whether
+        pyplot was imported
+    """
+    times,rss = [],[]
+    for i in range ( repeat ):
+        out = subprocess.check_output ( [sys.executable, '-c',
+            _probe % statement] ).decode().split()
+        times.append ( float(out[0]) )
+        pyplot,modules = out[1] == 'True',int(out[2])
+        rss.append ( int(out[3]) )
+    times.sort()
+    return {'benchmark':'import', 'statement':statement,
+            'best':times[0], 'median':times[len(times)//2],
+            'maxrss_kb':max(rss), 'modules':modules, 'pyplot':pyplot}
+
+def run ( repeat=5 ):
+    return [measure ( s, repeat ) for s in STATEMENTS]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( '--repeat', type=int, default=5 )
+    parser.add_argument ( '--output', default=None )
+    args = parser.parse_args ()
+    out = open ( args.output, 'w' ) if args.output else sys.stdout
+    for result in run ( args.repeat ):
+        out.write ( json.dumps ( result, sort_keys=True )+'\n' )
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+__doc__ = """Peak memory of Errorline and Boxplot relative to their input
+
+Every case creates its plot on a fresh Agg figure from single or double
+precision data and records the memory that is allocated on top of the
+input while the plot is created (peak_kb) and, after subtracting the fixed
+costs of the plot, relative to the size of the input (ratio). Run as
+
+    python -m benchmarks.bench_memory [--n 1000000] [--check]
+
+With --check, the exit status is 1 if any ratio exceeds the limit of its
+case, which catches copies or upcasts that creep into the data path.
+Requires tracemalloc (python 3).
+"""
+
+import json
+import sys
+import traceback
+
+import numpy as np
+
+import dvis
+from benchmarks import data
+
+def _errorline ( n, dtype ):
+    x,y,e = [np.asarray ( v, dtype ) for v in data.curve ( n )]
+    return (x,y,e),lambda fig: dvis.Errorline ( x, y, e,
+            ax=fig.add_subplot ( 111 ) )
+
+def _errorline_samples ( n, dtype ):
+    x,y = data.curve ( max ( 1, n//100 ), 100 )
+    x,y = np.asarray ( x, dtype ),np.asarray ( y, dtype )
+    return (x,y),lambda fig: dvis.Errorline ( x, y,
+            ax=fig.add_subplot ( 111 ) )
+
+def _boxplot ( n, dtype ):
+    x = np.asarray ( data.groups ( n, 10 ), dtype )
+    return (x,),lambda fig: dvis.Boxplot ( x, ax=fig.add_subplot ( 111 ) )
+
+# name: (factory, largest allowed ratio of peak memory and input size per
+# dtype). The limits are about 10% above the ratios measured for 400000 and
+# more values. Errorline converts single precision input to the double
+# precision vertices of the line and the error region, which costs twice as
+# much relative to the input.
+CASES = {
+        'Errorline':         (_errorline, {'float32':10., 'float64':5.4}),
+        'Errorline_samples': (_errorline_samples, {'float32':1.25, 'float64':1.2}),
+        'Boxplot':           (_boxplot, {'float32':2.2, 'float64':1.65}),
+        }
+
+def peak_memory ( plot ):
+    """Peak memory in bytes that is allocated while plot is created"""
+    import tracemalloc
+    fig = dvis.agg_figure ()
+    tracemalloc.start ()
+    try:
+        plot ( fig )
+        return tracemalloc.get_traced_memory ()[1]
+    finally:
+        tracemalloc.stop ()
+
+def measure ( case, n, dtype ):
+    """Peak memory of a single case
+
+    The peak of the same plot for 1000 values (after a first call that
+    loads lazy imports and fills caches) is the baseline, which covers the
+    axes, ticks and other fixed costs.
+
+    :Return:
+        a dictionary with the peak memory and the baseline in kB, the ratio
+        of the peak above the baseline to the input size and whether the
+        ratio is within the limit of the case for dtype. If the case fails,
+        the dictionary holds the traceback as 'error' instead.
+    """
+    result = {'benchmark':'memory', 'case':case, 'n':n, 'dtype':dtype}
+    factory,limits = CASES[case]
+    try:
+        small = factory ( 1000, dtype )[1]
+        peak_memory ( small )
+        baseline = peak_memory ( small )
+        arrays,plot = factory ( n, dtype )
+        peak = peak_memory ( plot )
+    except Exception:
+        result['error'] = traceback.format_exc ()
+        return result
+    ratio = float(max ( peak-baseline, 0 ))/sum ( [a.nbytes for a in arrays] )
+    result.update ( {'peak_kb':peak//1024, 'baseline_kb':baseline//1024,
+        'ratio':ratio, 'limit':limits[dtype], 'ok':ratio <= limits[dtype]} )
+    return result
+
+def run ( n=10**6, cases=None, dtypes=('float32','float64') ):
+    return [measure ( case, n, dtype ) for case in cases or sorted ( CASES )
+            for dtype in dtypes]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( '--n', type=int, default=10**6 )
+    parser.add_argument ( '--case', nargs='+', choices=sorted ( CASES ),
+            default=None )
+    parser.add_argument ( '--check', action='store_true' )
+    parser.add_argument ( '--output', default=None )
+    args = parser.parse_args ()
+    out = open ( args.output, 'w' ) if args.output else sys.stdout
+    results = run ( args.n, args.case )
+    for result in results:
+        out.write ( json.dumps ( result, sort_keys=True )+'\n' )
+    if args.check and not all ( [r.get ( 'ok', False ) for r in results] ):
+        sys.exit ( 1 )
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+__doc__ = """Exact and approximate range frame percentiles
+
+Times dvis.stats.percentiles and dvis.stats.trimmed_percentiles for every
+method on normal and heavy tailed samples and reports the largest deviation
+from the exact result relative to the data range. Run as
+
+    python -m benchmarks.bench_percentiles [--sizes N ...] [--output FILE]
+
+Results are written as JSON lines.
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+
+import dvis.stats
+
+METHODS = ["exact","partition","histogram"]
+DISTRIBUTIONS = {
+        'normal': lambda rng, n: rng.standard_normal ( n ),
+        'cauchy': lambda rng, n: rng.standard_cauchy ( n ),
+        }
+P = [0,25,50,75,100]
+
+def best_time ( f, repeat ):
+    times = []
+    for i in range ( repeat ):
+        t = time.time()
+        result = f ()
+        times.append ( time.time()-t )
+    return min ( times ),result
+
+def measure ( n, distribution, trim=False, tol=0.001, repeat=3, seed=0 ):
+    """Time every method on a sample of size n
+
+    :Return:
+        a list with one dictionary per method, holding the best time in
+        seconds, the speedup over the exact method and the largest error
+        relative to the data range
+    """
+    x = DISTRIBUTIONS[distribution] ( np.random.RandomState ( seed ), n )
+    if trim:
+        f = lambda method: dvis.stats.trimmed_percentiles ( x, 1.5, method, tol )
+    else:
+        f = lambda method: dvis.stats.percentiles ( x, P, method, tol )
+    span = float ( x.max()-x.min() )
+    results = []
+    for method in METHODS:
+        t,p = best_time ( lambda: f ( method ), repeat )
+        if method == 'exact':
+            t_exact,p_exact = t,p
+        results.append ( {'benchmark':'percentiles', 'n':n,
+            'distribution':distribution, 'trim':trim, 'method':method,
+            'tol':tol, 'best':t, 'speedup':t_exact/t,
+            'max_rel_error':float ( np.abs ( p-p_exact ).max()/span )} )
+    return results
+
+def run ( sizes=(10**5,10**6,10**7), tol=0.001, repeat=3 ):
+    results = []
+    for n in sizes:
+        for distribution in sorted ( DISTRIBUTIONS ):
+            for trim in (False,True):
+                results += measure ( n, distribution, trim, tol, repeat )
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( '--sizes', type=int, nargs='+',
+            default=[10**5,10**6,10**7] )
+    parser.add_argument ( '--tol', type=float, default=0.001 )
+    parser.add_argument ( '--repeat', type=int, default=3 )
+    parser.add_argument ( '--output', default=None )
+    args = parser.parse_args ()
+    out = open ( args.output, 'w' ) if args.output else sys.stdout
+    for result in run ( args.sizes, args.tol, args.repeat ):
+        out.write ( json.dumps ( result, sort_keys=True )+'\n' )
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+__doc__ = """Construction and drawing time of the dvis plotting functions
+
+Every case is rendered on a fresh Agg figure (pyplot is not used). The
+time to create the plot, to draw the figure for the first time and to draw
+it again are reported separately, together with the peak memory of a
+separate, traced run. Run as
+
+    python -m benchmarks.bench_plots [--preset quick|full] [--case NAME ...]
+
+Results are written as JSON lines.
+"""
+
+import json
+import sys
+import time
+import traceback
+
+import numpy as np
+
+import dvis
+import dvis.customized
+from benchmarks import data
+
+PRESETS = {
+        'quick': {'sizes':[10**3,10**5], 'groups':[1,10,100]},
+        'full':  {'sizes':[10**3,10**4,10**5,10**6,10**7],
+                  'groups':[1,10,100,1000]},
+        }
+
+def _scatter ( n, ngroups ):
+    x,y = data.points ( n )
+    return lambda fig: dvis.Scatter ( x, y, ax=fig.add_subplot ( 111 ) )
+
+def _boxplot ( n, ngroups ):
+    x = data.groups ( n, ngroups )
+    return lambda fig: dvis.Boxplot ( x, ax=fig.add_subplot ( 111 ) )
+
+def _density ( n, ngroups ):
+    x = data.groups ( n, ngroups )
+    return lambda fig: dvis.Density ( x, ax=fig.add_subplot ( 111 ) )
+
+def _errorline ( n, ngroups ):
+    x,y,e = data.curve ( n )
+    return lambda fig: dvis.Errorline ( x, y, e, ax=fig.add_subplot ( 111 ) )
+
+def _errorline_samples ( n, ngroups ):
+    x,y = data.curve ( max ( 1, n//100 ), 100 )
+    return lambda fig: dvis.Errorline ( x, y, ax=fig.add_subplot ( 111 ) )
+
+def _errorlines ( n, ngroups ):
+    x,y,e = data.curve ( max ( 1, n//ngroups ) )
+    Y = y+np.arange ( ngroups )[:,None]
+    return lambda fig: dvis.Errorlines ( x, Y, e, ax=fig.add_subplot ( 111 ) )
+
+def _errorline_loop ( n, ngroups ):
+    x,y,e = data.curve ( max ( 1, n//ngroups ) )
+    def plot ( fig ):
+        ax = fig.add_subplot ( 111 )
+        for i in range ( ngroups ):
+            dvis.Errorline ( x, y+i, e, ax=ax )
+    return plot
+
+def _errorline_faded ( n, ngroups ):
+    x,y,e = data.curve ( n )
+    return lambda fig: dvis.customized.Errorline_faded ( x, y, e,
+            np.linspace ( 1, 0, len(x) ), ax=fig.add_subplot ( 111 ) )
+
+def _luminancecode ( n, ngroups ):
+    x = data.values ( n )
+    return lambda fig: dvis.luminancecode ( x, 'b' )
+
+def _axes_grid ( n, ngroups ):
+    return lambda fig: dvis.axes_grid ( (ngroups,1), fig=fig )
+
+# name: (factory, uses sizes, uses groups, largest size)
+CASES = {
+        'Scatter':             (_scatter, True, False, 10**7),
+        'Boxplot':             (_boxplot, True, True, 10**7),
+        'Density':             (_density, True, True, 10**7),
+        'Errorline':           (_errorline, True, False, 10**7),
+        'Errorline_samples':   (_errorline_samples, True, False, 10**7),
+        'Errorlines':          (_errorlines, True, True, 10**7),
+        'Errorline_loop':      (_errorline_loop, True, True, 10**6),
+        'Errorline_faded':     (_errorline_faded, True, False, 10**5),
+        'luminancecode':       (_luminancecode, True, False, 10**7),
+        'axes_grid':           (_axes_grid, False, True, None),
+        }
+
+def new_figure ():
+    return dvis.agg_figure ()
+
+def timed_render ( plot, redraws=3 ):
+    """Construction, first draw and best redraw time of plot in seconds"""
+    fig = new_figure ()
+    t = time.time ()
+    plot ( fig )
+    construct = time.time ()-t
+    t = time.time ()
+    fig.canvas.draw ()
+    first_draw = time.time ()-t
+    redraw = []
+    for i in range ( redraws ):
+        t = time.time ()
+        fig.canvas.draw ()
+        redraw.append ( time.time ()-t )
+    return construct,first_draw,min ( redraw )
+
+def peak_memory ( plot ):
+    """Peak memory in kB of creating and drawing plot
+
+    Uses tracemalloc if available (python 3). Otherwise, the peak resident
+    size of the whole process is returned, which never decreases between
+    cases.
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        import resource
+        fig = new_figure ()
+        plot ( fig )
+        fig.canvas.draw ()
+        return resource.getrusage ( resource.RUSAGE_SELF ).ru_maxrss,'ru_maxrss'
+    tracemalloc.start ()
+    try:
+        fig = new_figure ()
+        plot ( fig )
+        fig.canvas.draw ()
+        peak = tracemalloc.get_traced_memory ()[1]
+    finally:
+        tracemalloc.stop ()
+    return peak//1024,'tracemalloc'
+
+def measure ( case, n=None, ngroups=None, repeat=3 ):
+    """Time a single case
+
+    :Return:
+        a dictionary with the best construction, first draw and redraw time
+        in seconds and the peak memory in kB. If the case fails, the
+        dictionary holds the traceback as 'error' instead.
+    """
+    result = {'benchmark':'plots', 'case':case, 'n':n, 'groups':ngroups}
+    try:
+        plot = CASES[case][0] ( n, ngroups )
+        times = [timed_render ( plot ) for i in range ( repeat )]
+        peak,source = peak_memory ( plot )
+    except Exception:
+        result['error'] = traceback.format_exc ()
+        return result
+    result.update ( {'construct':min ( [t[0] for t in times] ),
+            'first_draw':min ( [t[1] for t in times] ),
+            'redraw':min ( [t[2] for t in times] ),
+            'peak_kb':peak, 'peak_source':source} )
+    return result
+
+def configurations ( case, preset='quick' ):
+    """(n,ngroups) pairs of case for the preset"""
+    factory,sized,grouped,largest = CASES[case]
+    sizes = [n for n in PRESETS[preset]['sizes']
+            if largest is None or n <= largest] if sized else [None]
+    ngroups = PRESETS[preset]['groups'] if grouped else [None]
+    return [(n,g) for n in sizes for g in ngroups
+            if n is None or g is None or g <= n]
+
+def run ( preset='quick', cases=None, repeat=3 ):
+    results = []
+    for case in cases or sorted ( CASES ):
+        for n,ngroups in configurations ( case, preset ):
+            results.append ( measure ( case, n, ngroups, repeat ) )
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( '--preset', choices=sorted ( PRESETS ),
+            default='quick' )
+    parser.add_argument ( '--case', nargs='+', choices=sorted ( CASES ),
+            default=None )
+    parser.add_argument ( '--repeat', type=int, default=3 )
+    parser.add_argument ( '--output', default=None )
+    args = parser.parse_args ()
+    out = open ( args.output, 'w' ) if args.output else sys.stdout
+    for result in run ( args.preset, args.case, args.repeat ):
+        out.write ( json.dumps ( result, sort_keys=True )+'\n' )
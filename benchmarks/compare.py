@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+__doc__ = """Compare two benchmark result files
+
+Results are matched by their parameters and every metric of the new file is
+divided by the same metric of the old file. Run as
+
+    python -m benchmarks.compare OLD NEW [--threshold 1.2]
+
+The exit status is 1 if any ratio exceeds the threshold.
+"""
+
+import json
+import sys
+
+METRICS = ["best","median","construct","first_draw","redraw","peak_kb",
+        "maxrss_kb","seconds","serial","ratio"]
+IGNORED = ["error","peak_source","speedup","max_rel_error","modules",
+        "mismatches","pyplot","ok","limit"]
+
+def load ( fname ):
+    """Results in fname by their parameters"""
+    results = {}
+    for line in open ( fname ):
+        if not line.strip():
+            continue
+        result = json.loads ( line )
+        if result.get ( 'benchmark' ) == 'environment':
+            continue
+        key = tuple ( sorted ( (k,v) for k,v in result.items()
+            if k not in METRICS and k not in IGNORED ) )
+        results[key] = result
+    return results
+
+def compare ( old, new ):
+    """Ratios new/old for all metrics of the results in both files
+
+    :Return:
+        a list of (parameters, metric, old value, new value, ratio)
+    """
+    rows = []
+    for key in sorted ( set ( old ) & set ( new ), key=repr ):
+        for metric in METRICS:
+            a,b = old[key].get ( metric ),new[key].get ( metric )
+            if a is None or b is None:
+                continue
+            rows.append ( (dict ( key ),metric,a,b,b/float(a) if a else None) )
+    return rows
+
+def describe ( parameters ):
+    return " ".join ( "%s=%s" % (k,v) for k,v in sorted ( parameters.items() )
+            if v is not None )
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( 'old' )
+    parser.add_argument ( 'new' )
+    parser.add_argument ( '--threshold', type=float, default=1.2 )
+    args = parser.parse_args ()
+    slower = 0
+    for parameters,metric,a,b,ratio in compare ( load ( args.old ),
+            load ( args.new ) ):
+        flag = ""
+        if ratio is not None and ratio > args.threshold:
+            flag = "  <--"
+            slower += 1
+        sys.stdout.write ( "%-60s %-10s %12.4g %12.4g %8s%s\n" % (
+            describe ( parameters ), metric, a, b,
+            "-" if ratio is None else "%.2f" % ratio, flag) )
+    sys.exit ( 1 if slower else 0 )
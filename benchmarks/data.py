@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+__doc__ = """Synthetic data for the benchmarks
+
+All generators are deterministic for a given seed, so that results of
+different commits are based on the same data.
+"""
+
+import numpy as np
+
+def points ( n, seed=0 ):
+    """x and y coordinates of n correlated points"""
+    rng = np.random.RandomState ( seed )
+    x = rng.standard_normal ( n )
+    return x,.5*x+rng.standard_normal ( n )
+
+def groups ( n, ngroups, seed=0 ):
+    """n values split into ngroups columns with different location and scale
+
+    Every group has a few outliers, so that fliers are drawn.
+    """
+    rng = np.random.RandomState ( seed )
+    size = max ( 1, n//ngroups )
+    x = rng.standard_normal ( (size,ngroups) )
+    x[::97] *= 5
+    return x*rng.uniform ( .5, 2, ngroups )+np.arange ( ngroups )
+
+def curve ( n, nsamples=None, seed=0 ):
+    """A random walk with errors
+
+    :Return:
+        x, y and e with n values each or, if nsamples is given, x and an
+        (n,nsamples) array of samples around the walk
+    """
+    rng = np.random.RandomState ( seed )
+    x = np.arange ( n, dtype='d' )
+    y = np.cumsum ( rng.standard_normal ( n ) )/np.sqrt ( n )
+    if nsamples is None:
+        return x,y,.1+.05*rng.uniform ( size=n )
+    return x,y[:,None]+.1*rng.standard_normal ( (n,nsamples) )
+
+def values ( n, seed=0 ):
+    """n uniformly distributed values"""
+    return np.random.RandomState ( seed ).uniform ( size=n )
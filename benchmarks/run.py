@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+__doc__ = """Run all dvis benchmarks
+
+The first line of the output describes the environment (commit, python,
+numpy and matplotlib versions), every further line is a single result. Run
+as
+
+    python -m benchmarks.run [--preset quick|full] [--output FILE]
+
+and compare the output of two commits with benchmarks.compare.
+"""
+
+import json
+import platform
+import subprocess
+import sys
+
+from benchmarks import bench_import, bench_memory, bench_percentiles, \
+        bench_plots
+
+def environment ():
+    import numpy
+    import matplotlib
+    try:
+        commit = subprocess.check_output ( ['git','rev-parse','HEAD'],
+                stderr=subprocess.STDOUT ).decode().strip()
+    except (OSError,subprocess.CalledProcessError):
+        commit = None
+    return {'benchmark':'environment', 'commit':commit,
+            'python':platform.python_version(), 'numpy':numpy.__version__,
+            'matplotlib':matplotlib.__version__,
+            'machine':platform.machine(), 'system':platform.system()}
+
+def run ( preset='quick', repeat=3 ):
+    sizes = bench_plots.PRESETS[preset]['sizes']
+    return ( [environment ()] +
+            bench_import.run ( repeat ) +
+            bench_percentiles.run ( [n for n in sizes if n >= 10**5],
+                repeat=repeat ) +
+            bench_plots.run ( preset, repeat=repeat ) +
+            bench_memory.run ( max ( sizes ) ) )
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser ( description=__doc__.splitlines()[0] )
+    parser.add_argument ( '--preset', choices=sorted ( bench_plots.PRESETS ),
+            default='quick' )
+    parser.add_argument ( '--repeat', type=int, default=3 )
+    parser.add_argument ( '--output', default=None )
+    args = parser.parse_args ()
+    out = open ( args.output, 'w' ) if args.output else sys.stdout
+    for result in run ( args.preset, args.repeat ):
+        out.write ( json.dumps ( result, sort_keys=True )+'\n' )
@@ -0,0 +1,2 @@
+# Makes dvis and the benchmarks importable when pytest is run from a source
+# checkout without installing dvis
@@ -1,3 +1,69 @@
-from color import *
-from customized import *
-from prepare import *
+"""customized matplotlib extensions
+
+The submodules are only imported when one of their names is first used, so
+that importing dvis (for example to use cmix) neither loads pyplot nor
+starts a GUI backend.
+
+Thread safety: pyplot is only used by functions that are called without an
+explicit ax (or fig for axes_grid). Given explicit axes, all state that
+dvis creates lives on the artists of that figure, except for the color
+cache (which is locked) and the state of dvis.profiling and dvis.batch
+(which is kept per thread). Figures from dvis.agg_figure can therefore be
+built and saved concurrently, as long as every figure is used by a single
+thread at a time.
+"""
+
+import sys
+
+_submodules = {
+        'color':      ["cmix","col3","col4","luminancecode","colorcycle"],
+        'customized': ["Scatter","Boxplot","Density","Errorline","Errorlines",
+                       "StreamingErrorline"],
+        'prepare':    ["prepare_axes","axes_grid","AxesGridTemplate",
+                       "agg_figure"],
+        'stats':      ["bootstrap_median_ci","batch_boxplot_stats",
+                       "unpack_boxplot_stats","streaming_boxplot_stats",
+                       "weighted_boxplot_stats","histogram_boxplot_stats",
+                       "QuantileSketch","percentiles","trimmed_percentiles",
+                       "binned_kde",
+                       "sem_band","percentile_band",
+                       "bootstrap_band"],
+        'batch':      ["render_batch","render_spec"],
+        'profiling':  ["profile"],
+        'export':     ["savefig"],
+        'cache':      ["StatsCache"],
+        }
+_lazy_submodules = ["lod"]
+
+_exports = dict ( (name,module) for module,names in _submodules.items()
+        for name in names )
+
+__all__ = sorted ( _exports )
+
+if sys.version_info >= (3,7):
+    import importlib
+
+    def __getattr__ ( name ):
+        if name in _exports:
+            value = getattr ( importlib.import_module (
+                '.'+_exports[name], __name__ ), name )
+        elif name in _submodules or name in _lazy_submodules:
+            value = importlib.import_module ( '.'+name, __name__ )
+        else:
+            raise AttributeError ( "module %r has no attribute %r" % (__name__,name) )
+        globals()[name] = value
+        return value
+
+    def __dir__ ():
+        return sorted ( set ( list(globals()) + __all__ + list(_submodules) +
+                _lazy_submodules ) )
+else:
+    # Module level __getattr__ is not available before python 3.7
+    from dvis.color import *
+    from dvis.customized import *
+    from dvis.prepare import *
+    from dvis.stats import *
+    from dvis.batch import *
+    from dvis.profiling import *
+    from dvis.export import savefig
+    from dvis.cache import StatsCache
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+__doc__ = """Render many figures in a pool of processes
+
+Figures are described by declarative specs. A spec is a dictionary like
+
+    {'name':     'fig1',                 # used to identify the result
+     'filename': 'figures/fig1.pdf',     # if missing, the bytes are returned
+     'format':   'pdf',                  # (Default: png)
+     'size':     (4,3),                  # figure size in inches
+     'dpi':      100,
+     'max_vertices': 10000,              # rasterize denser layers (optional)
+     'grid':     (2,1),                  # axes_grid(grid, **grid_kwargs)
+     'grid_kwargs': {'hdist':.5},
+     'prepare':  {'haveon':('b','l')},   # prepare_axes for every axes
+     'plots':    [{'axes':(0,0), 'kind':'Boxplot', 'args':(data,)},
+                  {'axes':(1,0), 'kind':'set_xlabel', 'args':('time',)}]}
+
+The kind of a plot is either the name of a dvis function (which is called
+with ax set to the target axes) or the name of an Axes method. Without a
+grid, the figure has a single axes that is addressed by None.
+
+Every worker renders with the Agg canvas and reuses a single figure for all
+of its jobs, pyplot is never used. render_spec can also be called from
+several threads; every thread reuses its own figure.
+"""
+
+__all__ = ["render_batch","render_spec"]
+
+import io
+import multiprocessing
+import threading
+import traceback
+
+# Reused figure and the layout on it, per thread
+_local = threading.local ()
+
+def render_batch ( specs, processes=None, chunksize=4 ):
+    """Render figure specs in a pool of processes
+
+    :Parameters:
+        *specs*
+            iterable of figure specs (see module documentation)
+        *processes*
+            number of worker processes (Default: number of cpus). With
+            processes=1, the specs are rendered in the current process.
+        *chunksize*
+            number of specs that are sent to a worker at once
+
+    :Return:
+        an iterator over the results in the order in which they are
+        finished. Every result is a dictionary with the keys 'index' (of the
+        spec), 'name', 'ok', 'output' (filename or bytes) and 'error' (the
+        traceback if rendering failed). A failed spec does not stop the
+        batch.
+    """
+    jobs = enumerate ( specs )
+    if processes == 1:
+        for job in jobs:
+            yield _render_job ( job )
+        return
+    pool = multiprocessing.Pool ( processes )
+    try:
+        for result in pool.imap_unordered ( _render_job, jobs, chunksize ):
+            yield result
+        pool.close ()
+    finally:
+        pool.terminate ()
+        pool.join ()
+
+def render_spec ( spec, fig=None ):
+    """Render a single figure spec
+
+    :Parameters:
+        *spec*
+            a figure spec (see module documentation)
+        *fig*
+            figure to draw on. The figure is cleared first. (Default: a
+            figure that is reused between calls in the same thread. If
+            consecutive specs have the same grid layout, its axes are
+            cleared and reused.)
+
+    :Return:
+        the filename or the rendered bytes
+    """
+    import dvis.customized
+    import dvis.export
+    if fig is None:
+        fig = _get_figure ()
+    reused = fig is getattr ( _local, 'figure', None )
+    fig.set_size_inches ( spec.get ( 'size', (6.4,4.8) ) )
+    fig.set_dpi ( spec.get ( 'dpi', 100 ) )
+    prepare = spec.get ( 'prepare', None )
+
+    if spec.get ( 'grid', None ) is not None:
+        layout = repr ( (spec['grid'],
+            sorted ( spec.get ( 'grid_kwargs', {} ).items() ),
+            sorted ( (prepare or {}).items() )) )
+        if reused and _local.layout[0] == layout:
+            axes = _local.layout[1].reset ( _local.layout[2] )
+        else:
+            fig.clf ()
+            if prepare is not None:
+                prepare = dict ( prepare )
+                prepare.setdefault ( 'haveon', ('b','l') )
+            template = dvis.AxesGridTemplate ( spec['grid'],
+                    **dict ( spec.get ( 'grid_kwargs', {} ), **(prepare or {}) ) )
+            axes = template.stamp ( fig )
+            if reused:
+                _local.layout = (layout,template,axes)
+        getax = lambda index: axes[tuple(index)]
+    else:
+        fig.clf ()
+        if reused:
+            _local.layout = (None,None,None)
+        axes = fig.add_axes ( spec.get ( 'rect', [.1,.1,.85,.85] ) )
+        getax = lambda index: axes
+        if prepare is not None:
+            dvis.prepare_axes ( axes, **prepare )
+
+    for plot in spec.get ( 'plots', [] ):
+        ax = getax ( plot.get ( 'axes', None ) )
+        kind = plot['kind']
+        args = plot.get ( 'args', () )
+        kwargs = dict ( plot.get ( 'kwargs', {} ) )
+        if hasattr ( ax, kind ):
+            getattr ( ax, kind ) ( *args, **kwargs )
+        else:
+            kwargs['ax'] = ax
+            getattr ( dvis.customized, kind ) ( *args, **kwargs )
+
+    fmt = spec.get ( 'format', 'png' )
+    out = spec.get ( 'filename', None )
+    if out is None:
+        out = io.BytesIO ()
+    if spec.get ( 'max_vertices', None ) is not None:
+        dvis.export.savefig ( fig, out, spec['max_vertices'], dpi=fig.dpi,
+                format=fmt )
+    else:
+        fig.savefig ( out, format=fmt, dpi=fig.dpi )
+    if spec.get ( 'filename', None ) is not None:
+        return out
+    return out.getvalue ()
+
+def _get_figure ():
+    if getattr ( _local, 'figure', None ) is None:
+        import dvis.prepare
+        _local.figure = dvis.prepare.agg_figure ()
+        _local.layout = (None,None,None)
+    return _local.figure
+
+def _render_job ( job ):
+    index,spec = job
+    result = {'index':index, 'name':spec.get ( 'name', index ),
+            'ok':False, 'output':None, 'error':None}
+    try:
+        result['output'] = render_spec ( spec )
+        result['ok'] = True
+    except Exception:
+        result['error'] = traceback.format_exc ()
+    return result
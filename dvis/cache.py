@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+
+__doc__ = """Persistent cache for expensive statistics
+
+A StatsCache stores results on disk under a hash of the input data and the
+parameters of the computation, so that figures of unchanged data skip the
+statistics on the next run:
+
+    cache = dvis.cache.StatsCache ( 'stats-cache', maxbytes=2**30 )
+    dvis.Boxplot ( groups, bootstrap=5000, cache=cache )
+    dvis.Errorline ( x, samples, se='bootstrap', cache=cache )
+
+Entries are written to a temporary file and renamed into place, so several
+processes can share a directory. When the directory grows beyond maxbytes,
+the least recently used entries are removed.
+"""
+
+__all__ = ["StatsCache","array_key","get_cache"]
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+_hash = getattr ( hashlib, 'blake2b', None )
+if _hash is None:
+    _hash = hashlib.sha1
+else:
+    _hash = lambda: hashlib.blake2b ( digest_size=20 )
+
+# Bytes of strided arrays that are copied at once for hashing
+_blocksize = 2**22
+
+def array_key ( *parts ):
+    """Hash of arrays and parameters
+
+    Arrays are hashed by dtype, shape and contents, lists and tuples element
+    by element and everything else by its repr.
+    """
+    h = _hash ()
+    for part in parts:
+        _update ( h, part )
+    return h.hexdigest ()
+
+def _update ( h, part ):
+    if isinstance ( part, np.ndarray ):
+        if np.ma.isMaskedArray ( part ):
+            _update ( h, np.ma.getmaskarray ( part ) )
+            part = part.data
+        h.update ( repr ( (part.dtype.str,part.shape) ).encode() )
+        if part.flags.c_contiguous:
+            h.update ( part.data )
+        else:
+            # Strided arrays (like columns) are hashed in contiguous blocks,
+            # which gives the same hash as a contiguous copy
+            step = max ( 1, _blocksize//max ( 1, part[:1].nbytes ) )
+            for i in range ( 0, len(part), step ):
+                h.update ( np.ascontiguousarray ( part[i:i+step] ).data )
+    elif isinstance ( part, (list,tuple) ):
+        h.update ( repr ( (type(part).__name__,len(part)) ).encode() )
+        for p in part:
+            _update ( h, p )
+    else:
+        h.update ( repr ( part ).encode() )
+
+def get_cache ( cache ):
+    """Turn cache into a StatsCache
+
+    None and objects with a cached method are returned as they are,
+    everything else is taken as the directory of a StatsCache.
+    """
+    if cache is None or hasattr ( cache, 'cached' ):
+        return cache
+    return StatsCache ( cache )
+
+class StatsCache ( object ):
+    """A directory of pickled results with LRU eviction
+
+    :Parameters:
+        *directory*
+            directory of the cache (created if necessary)
+        *maxbytes*
+            maximum size of all entries
+
+    The total size is scanned once and then tracked in memory, so that
+    writes do not list the directory. Entries that other processes add are
+    noticed at the next eviction, which scans the directory again.
+    """
+    def __init__ ( self, directory, maxbytes=2**28 ):
+        self.directory = directory
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        # Total size of the entries, None until the directory is scanned
+        self._size = None
+        if not os.path.isdir ( directory ):
+            try:
+                os.makedirs ( directory )
+            except OSError:
+                # Another process may have created it
+                if not os.path.isdir ( directory ):
+                    raise
+
+    def _path ( self, key ):
+        return os.path.join ( self.directory, key+'.pkl' )
+
+    def get ( self, key, default=None ):
+        """The entry for key or default"""
+        path = self._path ( key )
+        try:
+            with open ( path, 'rb' ) as f:
+                value = pickle.load ( f )
+        except (IOError,OSError,EOFError,pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        try:
+            # The modification time marks the last use
+            os.utime ( path, None )
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def set ( self, key, value ):
+        """Store value under key and evict old entries if necessary"""
+        if self._size is None:
+            self._size = sum ( [size for mtime,size,path in self.entries ()] )
+        path = self._path ( key )
+        try:
+            replaced = os.path.getsize ( path )
+        except OSError:
+            replaced = 0
+        fd,tmp = tempfile.mkstemp ( dir=self.directory, suffix='.tmp' )
+        try:
+            with os.fdopen ( fd, 'wb' ) as f:
+                pickle.dump ( value, f, 2 )
+                written = f.tell ()
+            getattr ( os, 'replace', os.rename ) ( tmp, path )
+        except BaseException:
+            try:
+                os.remove ( tmp )
+            except OSError:
+                pass
+            raise
+        self._size += written-replaced
+        if self._size > self.maxbytes:
+            self.evict ()
+
+    def cached ( self, key, compute ):
+        """The entry for key, computed by compute() and stored if missing"""
+        missing = object ()
+        value = self.get ( key, missing )
+        if value is missing:
+            value = compute ()
+            self.set ( key, value )
+        return value
+
+    def entries ( self ):
+        """(modification time, size, path) of all entries"""
+        out = []
+        for name in os.listdir ( self.directory ):
+            if not name.endswith ( '.pkl' ):
+                continue
+            path = os.path.join ( self.directory, name )
+            try:
+                st = os.stat ( path )
+            except OSError:
+                continue
+            out.append ( (st.st_mtime,st.st_size,path) )
+        return out
+
+    def evict ( self ):
+        """Remove the least recently used entries beyond maxbytes"""
+        entries = sorted ( self.entries () )
+        total = sum ( [size for mtime,size,path in entries] )
+        for mtime,size,path in entries:
+            if total <= self.maxbytes:
+                break
+            try:
+                os.remove ( path )
+            except OSError:
+                # Removed by another process
+                pass
+            total -= size
+        self._size = total
+
+    def clear ( self ):
+        """Remove all entries"""
+        for mtime,size,path in self.entries ():
+            try:
+                os.remove ( path )
+            except OSError:
+                pass
+        self._size = 0
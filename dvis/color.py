@@ -1,37 +1,127 @@
 #!/usr/bin/env python
 
 import matplotlib.colors
-import pylab as pl
+import numpy as np
+import numbers
+import re
+import threading
+from collections import OrderedDict
 
-__all__ = ["cmix","col3","col4","luminancecode"]
+__all__ = ["cmix","col3","col4","luminancecode","colorcycle"]
 
 col3 = [(float(x)/255,float(y)/255,float(z)/255) for x,y,z in \
         [(25,25,112),(255,69,0),(200,255,255)] ]
 col4 = [(float(x)/255,float(y)/255,float(z)/255) for x,y,z in \
         [(25,25,112),(34,139,34),(255,215,0),(240,255,255)] ]
 
+# Bounded LRU cache of resolved colors (None for things that are not colors)
+color_cache_maxsize = 1024
+_color_cache = OrderedDict()
+_color_cache_lock = threading.Lock()
+_color_cache_stats = {'hits':0, 'misses':0}
+
+def to_rgb ( c ):
+    """Cached conversion of a color specification to an rgb tuple
+
+    :Return:
+        the rgb tuple or None if c cannot be interpreted as a color
+    """
+    key = _color_key ( c )
+    if key is None:
+        return _to_rgb ( c )
+    with _color_cache_lock:
+        if key in _color_cache:
+            _color_cache_stats['hits'] += 1
+            rgb = _color_cache[key] = _color_cache.pop ( key )
+            return rgb
+        _color_cache_stats['misses'] += 1
+    rgb = _to_rgb ( c )
+    with _color_cache_lock:
+        _color_cache[key] = rgb
+        while len(_color_cache) > color_cache_maxsize:
+            _color_cache.popitem ( last=False )
+    return rgb
+
+def color_cache_info ():
+    """Hits, misses and size of the color resolution cache"""
+    with _color_cache_lock:
+        return dict ( _color_cache_stats, size=len(_color_cache),
+                maxsize=color_cache_maxsize )
+
+def color_cache_clear ():
+    """Empty the color resolution cache and reset its counters"""
+    with _color_cache_lock:
+        _color_cache.clear()
+        _color_cache_stats.update ( hits=0, misses=0 )
+
+def _color_key ( c ):
+    if isinstance ( c, str ):
+        # 'C0', 'C1', ... refer to the current property cycle
+        if re.match ( r'^C\d+$', c ):
+            return None
+        return c
+    if isinstance ( c, (tuple,list,np.ndarray) ) and 3 <= len(c) <= 4:
+        # Only numbers make an rgb(a) color, sequences of strings like
+        # ('0.5','0.2','0.1') are several gray levels
+        if all ( [isinstance ( c_, numbers.Real ) for c_ in c] ):
+            return tuple ( float(c_) for c_ in c )
+    return None
+
+def _to_rgb ( c ):
+    if matplotlib.colors.is_color_like ( c ):
+        return tuple ( matplotlib.colors.colorConverter.to_rgb ( c ) )
+    return None
+
 def cmix ( c1, c2, ratio ):
     """mix two colors with
 
     :Parameters:
         *c1*
-            first color
+            first color or an (N,3) or (N,4) array of colors
         *c2*
-            second color
+            second color or an (N,3) or (N,4) array of colors
         *ratio*
-            amount c1/amount c2
+            amount c1/amount c2 (a scalar or an array of N ratios)
 
     :Return:
-        a mix of the two colors
+        a mix of the two colors. If only single colors and a scalar ratio
+        are given, this is a list, otherwise it is an (N,3) or (N,4) array
+        (with N the common length of the inputs).
     """
-    p = float(ratio)/(1+ratio)
-    q = 1-p
+    if np.isscalar ( ratio ) and to_rgb ( c1 ) is not None and \
+            to_rgb ( c2 ) is not None:
+        p = float(ratio)/(1+ratio)
+        q = 1-p
 
-    # Make sure that both colors are lists
-    c1 = __mkcolorlist ( c1 )
-    c2 = __mkcolorlist ( c2 )
+        # Make sure that both colors are lists
+        c1 = __mkcolorlist ( c1 )
+        c2 = __mkcolorlist ( c2 )
 
-    return [p*_1 + q*_2 for _1,_2 in zip ( c1,c2 )]
+        return [p*_1 + q*_2 for _1,_2 in zip ( c1,c2 )]
+
+    c1 = colorarray ( c1 )
+    c2 = colorarray ( c2 )
+    if c1.shape[1] != c2.shape[1]:
+        c1,c2 = [np.c_[c,np.ones(len(c))] if c.shape[1]==3 else c for c in (c1,c2)]
+    ratio = np.asarray ( ratio, 'd' )
+    p = (ratio/(1+ratio)).reshape ( (-1,1) )
+    return p*c1 + (1-p)*c2
+
+def colorarray ( c ):
+    """Convert c to an (N,3) or (N,4) float array of colors
+
+    :Parameters:
+        *c*
+            a single color, an (N,3) or (N,4) array of rgb(a) values or a
+            sequence of colors
+    """
+    rgb = to_rgb ( c )
+    if rgb is not None:
+        return np.array ( [rgb] )
+    if isinstance ( c, np.ndarray ) and c.ndim == 2 and c.shape[1] in (3,4) \
+            and c.dtype.kind in 'fiu':
+        return np.asarray ( c, 'd' )
+    return np.array ( [__mkcolorlist ( c_ ) for c_ in c] )
 
 def luminancecode ( x, basecolor, **kwargs ):
     """Create a code for the values in x
@@ -49,20 +139,62 @@ def luminancecode ( x, basecolor, **kwargs ):
             maximum of color scale (default: max(x))
         *mincol*
             minimum color concentration (default: 0.1)
+
+    :Return:
+        an (N,3) array of rgb values that can be passed to scatter(c=...)
     """
-    vmin = float(kwargs.setdefault ( 'vmin', min(x) ))
-    vmax = float(kwargs.setdefault ( 'vmax', max(x) ))
+    x = np.asarray ( x )
+    vmin = float(kwargs.setdefault ( 'vmin', x.min() ))
+    vmax = float(kwargs.setdefault ( 'vmax', x.max() ))
     mincol = float(kwargs.setdefault('mincol', 0.1 ))
 
-    ratios = pl.clip(((vmax-x)/(vmax-vmin)),0,1e8)/mincol
+    ratios = np.clip(((vmax-x)/(vmax-vmin)),0,1e8)/mincol
+
+    return cmix ( 'w', basecolor, ratios.ravel() )
+
+def colorcycle ( k, colors=None, cmap=None ):
+    """Colors for k curves
+
+    :Parameters:
+        *k*
+            number of colors
+        *colors*
+            colors that are repeated cyclically (Default: col3 for up to
+            three curves, col4 otherwise)
+        *cmap*
+            name of a colormap or a colormap. If given, the k colors are
+            spread evenly over the colormap.
 
-    return [cmix('w',basecolor,r) for r in ratios]
+    :Return:
+        a (k,3) or (k,4) array of colors
+    """
+    if cmap is not None:
+        if not callable ( cmap ):
+            cmap = _get_cmap ( cmap )
+        return np.asarray ( cmap ( np.linspace ( 0, 1, k ) ), 'd' )
+    if colors is None:
+        colors = col3 if k <= 3 else col4
+    colors = colorarray ( colors )
+    return colors[np.arange ( k )%len(colors)]
+
+def _get_cmap ( name ):
+    try:
+        return matplotlib.colormaps[name]
+    except AttributeError:
+        # matplotlib < 3.5
+        from matplotlib.cm import get_cmap
+        return get_cmap ( name )
 
 def colorsequence ( c ):
     """Make sure the entries in c can be interpreted as a sequence
     so that iterating of c gives a sequence of rgb tuples in turn"""
-    if matplotlib.colors.is_color_like ( c ):
-        return [matplotlib.colors.colorConverter.to_rgb ( c )]
+    if isinstance ( c, np.ndarray ) and c.ndim == 2 and c.shape[1] in (3,4) \
+            and c.dtype.kind in 'fiu':
+        # numeric arrays of rgb(a) rows do not need to be looked at one by one
+        return [tuple(c_) for c_ in np.asarray ( c[:,:3], 'd' ).tolist()]
+    rgb = to_rgb ( c )
+    if rgb is not None:
+        return [rgb]
     out = []
     if hasattr ( c, '__iter__' ):
         for c_ in c:
@@ -71,8 +203,8 @@ def colorsequence ( c ):
 
 
 def __mkcolorlist ( c ):
-    if matplotlib.colors.is_color_like ( c ):
-        return list(matplotlib.colors.colorConverter.to_rgb(c))
+    rgb = to_rgb ( c )
+    if rgb is not None:
+        return list(rgb)
     else:
-        print c
-        raise ValueError, "c cannot be converted to a color"
+        raise ValueError ( "%r cannot be converted to a color" % (c,) )
@@ -1,15 +1,28 @@
 #!/usr/bin/env python
 
-import pylab as pl
-from matplotlib.artist import Artist
-from matplotlib.collections import LineCollection
+import numpy as np
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import PathPatch, Polygon
+from matplotlib.path import Path
 from matplotlib.ticker import FormatStrFormatter
 
+import dvis.cache
 import dvis.color
+import dvis.lod
+import dvis.profiling
+import dvis.stats
 
-__all__ = ["Scatter","Boxplot","Errorline"]
+__all__ = ["Scatter","Boxplot","Density","Errorline","Errorlines","StreamingErrorline"]
 
-def Scatter ( x, y, ax=None, **kwargs ):
+def _gca ():
+    """pyplot's current axes (pyplot is only imported if this is needed)"""
+    import matplotlib.pyplot
+    return matplotlib.pyplot.gca()
+
+def Scatter ( x, y, ax=None, lod=False, approx=False, tol=0.001,
+        trim=False, **kwargs ):
     """Creates a Tufte scatter plot
 
     :Parameters:
@@ -17,15 +30,55 @@ def Scatter ( x, y, ax=None, **kwargs ):
             x and y values of the scatter plot
         *ax*
             target axes (defaults to gca())
+        *lod*
+            if True, only one point per occupied 2x2 pixel cell of the view is
+            shown, or an image of the point density if there are too many of
+            these (see dvis.lod.ScatterLOD). The range frame is always
+            computed from all points.
+        *approx*
+            if True, the percentiles of the range frame are approximated
+            from a histogram with a resolution of tol times the data range.
+            approx can also name a method of dvis.stats.percentiles.
+        *tol*
+            tolerance of the approximate percentiles
+        *trim*
+            if True, the range frame does not extend to outliers
 
     :Optional keyword arguments:
-        See pylab.scatter
+        *animated*
+            mark the points and the range frame as animated for blitting.
+            (Default: False)
+
+        See pylab.scatter for the rest
+
+    :Return:
+        the PathCollection of the points. Its range_frame attribute holds
+        the RangeFrameArtist, which follows the offsets of the points unless
+        lod is used:
+
+            S = Scatter ( x[0], y[0], ax=ax, animated=True )
+            def update ( frame ):
+                S.set_offsets ( np.c_[x[frame],y[frame]] )
+                return S,S.range_frame
     """
     if ax is None:
-        ax = pl.gca()
-    ax.add_artist ( RangeFrameArtist ( x, y ) )
+        ax = _gca()
+    if approx is True:
+        approx = 'histogram'
+    frame = RangeFrameArtist ( x, y, trim=trim, method=approx or 'exact',
+            tol=tol )
+    frame.set_animated ( kwargs.get ( 'animated', False ) )
+    ax.add_artist ( frame )
+    if frame.get_animated():
+        # The axis is only drawn with the background
+        frame.update_ticks ()
     ax.set_frame_on ( False )
     S = ax.scatter ( x, y, **kwargs )
+    S.range_frame = frame
+    if lod:
+        S.lod = dvis.lod.ScatterLOD ( ax, x, y, S )
+    else:
+        frame.follow ( S )
     ax.tick_params ( labelsize=8 )
     ax.get_xaxis().set_major_formatter ( FormatStrFormatter ( "%.3f" ) )
     ax.get_yaxis().set_major_formatter ( FormatStrFormatter ( "%.3f" ) )
@@ -36,22 +89,87 @@ def Boxplot ( x, ax=None, offset=0.005, **kwargs ):
 
     :Parameters:
         *x*
-            values to be summarized
+            values to be summarized. Groups that are memory mapped arrays or
+            iterables of chunks (see dvis.stats.is_chunked) are summarized
+            in two streaming passes (see dvis.stats.streaming_boxplot_stats).
         *ax*
             target axes
         *offset*
             offset to mark central part and median gap
 
     :Optional keyword arguments:
-        See pylab.boxplot
+        *eps*
+            approximate rank error of the quartiles of chunked groups
+            (Default: 0.001)
+        *maxfliers*
+            maximum number of fliers per side shown for chunked groups
+            (Default: 1000)
+        *animated*
+            mark the boxes as animated for blitting (Default: False)
+        *weights*
+            weights (for example counts) of the values in x, with the same
+            shape as x (see dvis.stats.weighted_boxplot_stats)
+        *bins*
+            if given, x holds histogram counts and bins the bin edges, either
+            shared by all groups or one array per group (see
+            dvis.stats.histogram_boxplot_stats)
+        *cache*
+            a dvis.cache.StatsCache (or its directory). Groups whose
+            statistics are in the cache are not computed again. Chunked
+            groups are never cached.
+
+        See pylab.boxplot for the rest
+
+    :Return:
+        a BoxplotSet, the data of which can be replaced by set_data
     """
     if ax is None:
-        ax = pl.gca()
+        ax = _gca()
     # call a boxplot and manipulate it
     # how to get the offset right?
+    x = _boxplot_groups ( x )
+    positions,c = _group_axes ( ax, len(x), kwargs )
+
+    boxstats = _boxplot_stats ( x, ax, kwargs )
+
+    boxes = BoxplotSet ( ax, kwargs )
+    for i,pos in enumerate ( positions ):
+        kwargs['color'] = c[i%len(c)]
+        box = BoxplotArtist ( pos, boxstats[i], offset, **kwargs )
+        box.set_animated ( kwargs.get ( 'animated', False ) )
+        ax.add_artist ( box )
+        ax.update_datalim ( box.get_datalim() )
+        boxes.append ( box )
+    ax.autoscale_view ()
+    return boxes
+
+def _group_axes ( ax, ngroups, kwargs ):
+    """Positions and colors of ngroups groups along the group axis of ax
+
+    Sets the limits and ticks of the group axis (the y axis if vert is 1).
+    """
+    positions = kwargs.setdefault ( 'positions', range(1,ngroups+1) )
+    pdist = max(positions)-min(positions)
+    offs = 0.5*float(pdist)/len(positions)
+
+    if kwargs.setdefault('vert', 0 ) == 1:
+        ax.set_ylim ( positions[0]-offs, positions[-1]+offs )
+        ax.set_yticks ( positions )
+    else:
+        ax.set_xlim ( positions[0]-offs, positions[-1]+offs )
+        ax.set_xticks ( positions )
+
+    c = kwargs.setdefault ( 'color', [0,0,0] )
+    return positions,dvis.color.colorsequence ( c )
+
+def _boxplot_groups ( x ):
+    """List of the groups in x"""
+    if not hasattr ( x, '__len__' ) and dvis.stats.is_chunked ( x ):
+        # A single group given as a re-iterable of chunks
+        return [x]
     if hasattr (x,'shape'):
         if len(x.shape)==1:
-            if hasattr(x[0], 'shape'):
+            if x.dtype == object:
                 x = list(x)
             else:
                 x = [x,]
@@ -60,38 +178,206 @@ def Boxplot ( x, ax=None, offset=0.005, **kwargs ):
             if nr==1:
                 x = [x]
             elif nc==1:
-                x = [x.ravel()]
+                x = [x[:,0]]
             else:
-                x = [x[:,i] for i in xrange(nc)]
+                x = [x[:,i] for i in range(nc)]
         else:
-            raise ValueError, "input x can have no more than 2 dimensions"
-    if not hasattr(x[0],'__len__'):
+            raise ValueError ( "input x can have no more than 2 dimensions" )
+    x = list ( x )
+    if not hasattr(x[0],'__len__') and not dvis.stats.is_chunked ( x[0] ):
         x = [x]
+    return x
 
-    positions = kwargs.setdefault ( 'positions', range(1,len(x)+1) )
-    pdist = max(positions)-min(positions)
-    offs = 0.5*float(pdist)/len(positions)
+def _boxplot_stats ( x, ax, kwargs ):
+    """Statistics of all groups in x for Boxplot with kwargs"""
+    with dvis.profiling.timed ( ax, 'stats', 'Boxplot' ):
+        whis = kwargs.setdefault ( 'whis', 1.5 )
+        bootstrap = kwargs.setdefault ( 'bootstrap', None )
+        rng = kwargs.setdefault ( 'rng', None )
+        weights = kwargs.get ( 'weights', None )
+        bins = kwargs.get ( 'bins', None )
+        if weights is not None or bins is not None:
+            if weights is not None:
+                weights = _boxplot_groups ( weights )
+                if len(weights) != len(x):
+                    raise ValueError ( "expected weights for %d groups, got %d" % (len(x),len(weights)) )
+            if bins is not None and np.ndim ( bins[0] ) == 0:
+                bins = [bins]*len(x)
+            return [calculate_boxplot_stats ( x_, whis=whis,
+                bootstrap=bootstrap, rng=rng,
+                weights=None if weights is None else weights[i],
+                bins=None if bins is None else bins[i],
+                cache=kwargs.get ( 'cache', None ) )
+                for i,x_ in enumerate ( x )]
+        if any ( [dvis.stats.is_chunked ( x_ ) for x_ in x] ):
+            if bootstrap is not None:
+                raise ValueError ( "bootstrapped notches are not available for chunked input" )
+            rng = dvis.stats.get_rng ( rng )
+            return [dvis.stats.streaming_boxplot_stats ( x_, whis,
+                eps=kwargs.setdefault ( 'eps', 0.001 ),
+                maxfliers=kwargs.setdefault ( 'maxfliers', 1000 ), rng=rng )
+                if dvis.stats.is_chunked ( x_ ) else
+                calculate_boxplot_stats ( x_, **kwargs ) for x_ in x]
+        cache = dvis.cache.get_cache ( kwargs.get ( 'cache', None ) )
+        if cache is None:
+            return dvis.stats.unpack_boxplot_stats (
+                    *dvis.stats.batch_boxplot_stats ( x, whis=whis,
+                        bootstrap=bootstrap, rng=rng ) )
+        # Only the groups that are not in the cache are computed
+        keys = [_boxstats_key ( x_, whis, bootstrap, rng ) for x_ in x]
+        boxstats = [cache.get ( key ) for key in keys]
+        missing = [i for i,b in enumerate ( boxstats ) if b is None]
+        if missing:
+            computed = dvis.stats.unpack_boxplot_stats (
+                    *dvis.stats.batch_boxplot_stats ( [x[i] for i in missing],
+                        whis=whis, bootstrap=bootstrap, rng=rng ) )
+            for i,b in zip ( missing, computed ):
+                cache.set ( keys[i], b )
+                boxstats[i] = b
+        return boxstats
 
-    if kwargs.setdefault('vert', 0 ) == 1:
-        ax.set_ylim ( positions[0]-offs, positions[-1]+offs )
-        ax.set_yticks ( positions )
-    else:
-        ax.set_xlim ( positions[0]-offs, positions[-1]+offs )
-        ax.set_xticks ( positions )
+class BoxplotSet ( list ):
+    """The boxes created by Boxplot
 
-    c = kwargs.setdefault ( 'color', [0,0,0] )
-    c = dvis.color.colorsequence ( c )
+    Replacing the data only recomputes the statistics and moves the
+    existing sub-artists, which makes the boxes suitable for blitted
+    animations:
+
+        boxes = Boxplot ( window ( 0 ), ax=ax, animated=True )
+        def update ( frame ):
+            return boxes.set_data ( window ( frame ) )
+        matplotlib.animation.FuncAnimation ( fig, update, blit=True )
+    """
+    def __init__ ( self, ax, kwargs ):
+        list.__init__ ( self )
+        self.axes = ax
+        self._kwargs = kwargs
+
+    def set_data ( self, x, rescale=False, weights=None ):
+        """Replace the data of all boxes
+
+        :Parameters:
+            *x*
+                new values with the same number of groups (see Boxplot)
+            *rescale*
+                if True, the data limits of the axes are updated and the
+                view is autoscaled. This redraws the axis and therefore
+                defeats blitting.
+            *weights*
+                new weights of the values (Default: the weights passed to
+                Boxplot, if any)
+
+        :Return:
+            the boxes
+        """
+        if weights is not None:
+            self._kwargs['weights'] = weights
+        x = _boxplot_groups ( x )
+        if len(x) != len(self):
+            raise ValueError ( "expected %d groups, got %d" % (len(self),len(x)) )
+        boxstats = _boxplot_stats ( x, self.axes, self._kwargs )
+        for box,stats in zip ( self, boxstats ):
+            box.set_boxstats ( stats )
+            if rescale:
+                self.axes.update_datalim ( box.get_datalim() )
+        if rescale:
+            self.axes.autoscale_view ()
+        return self
+
+    def set_animated ( self, animated ):
+        for box in self:
+            box.set_animated ( animated )
+
+def Density ( x, ax=None, width=0.8, **kwargs ):
+    """Creates density strips (violins) of groups, for example next to a Boxplot
+
+    The densities of all groups are estimated at once on a common grid (see
+    dvis.stats.binned_kde) and drawn as a single collection, at the
+    positions and in the colors that Boxplot uses for the same arguments.
+
+    :Parameters:
+        *x*
+            values of the groups (as in Boxplot, nan values are ignored)
+        *ax*
+            target axes
+        *width*
+            largest width of a strip in units of the group axis
+
+    :Optional keyword arguments:
+        *positions*, *vert*, *color*
+            as in Boxplot
+        *ngrid*
+            number of grid points (Default: 256)
+        *bw*
+            bandwidth, see dvis.stats.binned_kde (Default: 'scott')
+        *cut*
+            the strips extend cut bandwidths beyond the data (Default: 0)
+        *side*
+            'both' for violins, 'lower' or 'upper' for half strips that
+            leave room for a Boxplot on the other side (Default: 'both')
+        *scale*
+            'width' gives every strip the same largest width, 'area' the
+            same area (Default: 'width')
+
+        The rest is passed to matplotlib.collections.PolyCollection
+
+    :Return:
+        the PolyCollection of the strips
+    """
+    if ax is None:
+        ax = _gca()
+    x = _boxplot_groups ( x )
+    positions,c = _group_axes ( ax, len(x), kwargs )
+    for key in ('positions','color'):
+        kwargs.pop ( key )
+    vert = kwargs.pop ( 'vert' )
+    ngrid = kwargs.pop ( 'ngrid', 256 )
+    bw = kwargs.pop ( 'bw', 'scott' )
+    cut = kwargs.pop ( 'cut', 0 )
+    side = kwargs.pop ( 'side', 'both' )
+    scale = kwargs.pop ( 'scale', 'width' )
+    if side not in ('both','lower','upper'):
+        raise ValueError ( "side should be 'both', 'lower' or 'upper'" )
+    if scale not in ('width','area'):
+        raise ValueError ( "scale should be 'width' or 'area'" )
+
+    with dvis.profiling.timed ( ax, 'stats', 'Density' ):
+        grid,density,bw = dvis.stats.binned_kde ( x, ngrid, bw, cut )
+    if scale == 'width':
+        top = density.max ( 1 )
+    else:
+        top = np.ones ( len(x) )*density.max()
+    density = density/np.where ( top > 0, top, 1 )[:,None]
 
+    lo = -0.5*width if side in ('both','lower') else 0.
+    hi = 0.5*width if side in ('both','upper') else 0.
+    polys = []
     for i,pos in enumerate ( positions ):
-        d = pl.ravel(x[i])
-        kwargs['color'] = c[i%len(c)]
-        ax.add_artist (
-                BoxplotArtist ( pos,
-                    calculate_boxplot_stats ( d, **kwargs ),
-                    offset,
-                    **kwargs ) )
+        g = np.asarray ( x[i], 'd' )
+        g = g[~np.isnan ( g )]
+        if not len(g):
+            polys.append ( np.zeros ( (0,2) ) )
+            continue
+        inside = (grid >= g.min()-cut*bw[i]) & (grid <= g.max()+cut*bw[i])
+        v = grid[inside]
+        d = density[i,inside]
+        xy = np.empty ( (2*len(v),2) )
+        xy[:len(v),0] = pos+lo*d
+        xy[len(v):,0] = (pos+hi*d)[::-1]
+        xy[:len(v),1] = v
+        xy[len(v):,1] = v[::-1]
+        if vert == 1:
+            xy = xy[:,::-1]
+        polys.append ( xy )
+
+    kwargs.setdefault ( 'facecolors', dvis.color.cmix ( c, 'w', 1.5 ) )
+    kwargs.setdefault ( 'edgecolors', 'none' )
+    strips = PolyCollection ( polys, **kwargs )
+    ax.add_collection ( strips )
+    ax.autoscale_view ()
+    return strips
 
-def Errorline ( x, y, e=None, se=None, ax=None, **kwargs ):
+def Errorline ( x, y, e=None, se=None, ax=None, lod=False, **kwargs ):
     """Creates a line with a filled error region
 
     :Parameters:
@@ -106,75 +392,240 @@ def Errorline ( x, y, e=None, se=None, ax=None, **kwargs ):
             observations. In the latter case, se is applied to every sample
             of e
         *se*
-            function that takes a sample and gives the upper and lower sample
+            function that takes a sample and gives the upper and lower sample.
+            Reducers marked with dvis.stats.axis_reducer are applied to all
+            samples at once. Builtin reducers can be selected by name:
+            'sem' (default), 'percentile' or 'bootstrap' (see
+            dvis.stats.sem_band, percentile_band and bootstrap_band).
         *ax*
             target axes
+        *lod*
+            if True (or 'minmax' or 'lttb'), only the part of the line that is
+            in view is drawn, reduced to the resolution of the axes (see
+            dvis.lod.LineLOD). x has to be increasing.
 
     :Optional Keyword Arguments:
-        are passed to pylab.plot and to pylab.fill
+        *cache*
+            a dvis.cache.StatsCache (or its directory) for the error limits
+            derived from samples. Only reducers with a cache_key attribute
+            (like the builtin ones) are cached.
+
+        the rest is passed to pylab.plot and to pylab.fill
     """
     c = dvis.color.colorsequence ( kwargs.setdefault ( 'color', [0,0,0]))[0]
     kwargs.setdefault ( 'edgecolor', dvis.color.cmix ( c, 'w', 3 ) )
     kwargs.setdefault ( 'facecolor', dvis.color.cmix ( c, 'w', 1.5 ) )
-    if se is None:
-        se = lambda x: (pl.mean(x)-pl.std(x)/pl.sqrt(len(x)),pl.mean(x)+pl.std(x)/pl.sqrt(len(x)))
+    cache = dvis.cache.get_cache ( kwargs.pop ( 'cache', None ) )
+    se = dvis.stats.get_reducer ( se )
     if ax is None:
-        ax = pl.gca()
+        ax = _gca()
 
-    x = pl.array(x)
-    y = pl.array(y)
+    # Inputs are used as they are (float32 and memory maps are not copied)
+    # and the error region is written into a single vertex buffer
+    x = np.asarray(x)
+    y = np.asarray(y)
     if len(y.shape)==1:
-        assert len(y.ravel())==len(x.ravel())
+        assert y.size==x.size
+        band = _band_buffer ( x )
+        lo,hi = _band_limits ( band )
         if e is None:
             e = 0.
-            ye = pl.concatenate ( (y-e,(y+e)[::-1]) )
-        elif isinstance ( e, float ):
-            ye = pl.concatenate ( (y-e,(y+e)[::-1]) )
-        elif len(e.shape)==1:
-            assert len(y.ravel())==len(e.ravel())
-            ye = pl.concatenate ( (y-e,(y+e)[::-1]) )
+        e = np.asarray ( e )
+        if e.ndim < 2:
+            assert e.ndim == 0 or y.size==e.size
+            np.subtract ( y, e, out=lo )
+            np.add ( y, e, out=hi )
         elif len(e.shape)==2:
             if 2 in e.shape:
                 if e.shape[0] == 2:
                     e = e.T
-                ye = pl.concatenate ( (e[:,0],e[::-1,1]) )
+                lo[:] = e[:,0]
+                hi[:] = e[:,1]
             else:
-                ye1,ye2 = pl.zeros(e.shape[0],'d'),pl.zeros(e.shape[0],'d')
-                for i in xrange ( y.shape[0] ):
-                    ye1[i],ye2[i] = se(e[i,:])
-                ye = pl.concatenate ( (ye1,ye2[::-1]) )
+                lo[:],hi[:] = _reduce_samples ( se, e, cache )
     else:
         # Errors
         if e is None:
-            if y.shape[1] == len(x.ravel()):
+            if y.shape[1] == x.size:
                 y = y.T
-            ye1,ye2 = pl.zeros(y.shape[0],'d'),pl.zeros(y.shape[0],'d')
-            for i in xrange ( y.shape[0] ):
-                ye1[i],ye2[i] = se(y[i,:])
-            ye = pl.concatenate ( (ye1,ye2[::-1]) )
-            y = pl.mean(y,1)
+            band = _band_buffer ( x )
+            lo,hi = _band_limits ( band )
+            lo[:],hi[:] = _reduce_samples ( se, y, cache )
+            y = np.mean(y,1)
         else:
-            raise ValueError,"y has more than one value per datapoint but e is specified"
+            raise ValueError ( "y has more than one value per datapoint but e is specified" )
+    _close_band ( band )
+
+    if lod:
+        lod = dvis.lod.LineLOD ( ax, x, y, lo, hi,
+                method='lttb' if lod == 'lttb' else 'minmax' )
+        (x,y),band = lod.reduce ()
 
     try:
         l = ax.plot ( x, y, **kwargs )
-    except TypeError:
+    except (TypeError,AttributeError):
+        # Some matplotlib versions reject the fill properties
         l = ax.plot ( x, y )
-        for k,v in kwargs.iteritems ():
+        for k,v in kwargs.items():
             funcName = "set_"+k
             if hasattr(l[0],funcName):
                 func = getattr(l[0],funcName)
                 func(v)
 
-    f = ax.fill ( pl.concatenate ( (x,x[::-1]) ), ye, **kwargs )
+    f = _fill ( ax, band, kwargs )
+    if lod:
+        lod.attach ( l[0], f[0] )
     return l,f
 
+def Errorlines ( x, Y, E=None, se=None, ax=None, colors=None, cmap=None,
+        **kwargs ):
+    """Creates many lines with filled error regions in two collections
+
+    :Parameters:
+        *x*
+            x values shared by all lines
+        *Y*
+            (k,n) array with the y values of k lines. If Y has shape
+            (k,n,m), the lines are the means of m samples and se is used to
+            derive the error regions.
+        *E*
+            errors. This can be a scalar, an array that broadcasts to (k,n)
+            for symmetric errors or a (k,2,n) array of lower and upper
+            limits.
+        *se*
+            reducer for samples (see Errorline)
+        *ax*
+            target axes
+        *colors*
+            line colors, repeated cyclically (Default: dvis.col3 or
+            dvis.col4, see dvis.color.colorcycle)
+        *cmap*
+            colormap to take the line colors from instead
+
+    :Optional Keyword Arguments:
+        *edgecolors,facecolors*
+            colors of the error regions (Default: the line colors mixed
+            with white as in Errorline)
+        *cache*
+            cache for the error limits derived from samples (see Errorline)
+
+        the rest is passed to the LineCollection
+
+    :Return:
+        a LineCollection with the lines and a PolyCollection with the error
+        regions
+    """
+    cache = dvis.cache.get_cache ( kwargs.pop ( 'cache', None ) )
+    if ax is None:
+        ax = _gca()
+    x = np.asarray ( x )
+    Y = np.asarray ( Y )
+    n = len(x)
+    if Y.ndim == 1:
+        Y = Y[None,:]
+    if Y.ndim == 3:
+        if E is not None:
+            raise ValueError ( "Y has more than one value per datapoint but E is specified" )
+        k,m = Y.shape[0],Y.shape[2]
+        lo,hi = _reduce_samples ( dvis.stats.get_reducer ( se ),
+                Y.reshape ( (k*n,m) ), cache )
+        lo,hi = lo.reshape ( (k,n) ),hi.reshape ( (k,n) )
+        Y = Y.mean ( 2 )
+    elif E is None:
+        lo = hi = Y
+    else:
+        E = np.asarray ( E )
+        if E.ndim == 3:
+            lo,hi = E[:,0],E[:,1]
+        else:
+            lo,hi = Y-E,Y+E
+    k = Y.shape[0]
+
+    c = dvis.color.colorcycle ( k, colors, cmap )
+    edgecolors = kwargs.pop ( 'edgecolors', dvis.color.cmix ( c, 'w', 3 ) )
+    facecolors = kwargs.pop ( 'facecolors', dvis.color.cmix ( c, 'w', 1.5 ) )
+
+    segments = np.empty ( (k,n,2), 'd' )
+    segments[...,0] = x
+    segments[...,1] = Y
+    verts = np.empty ( (k,2*n,2), 'd' )
+    verts[:,:n,0] = x
+    verts[:,n:,0] = x[::-1]
+    verts[:,:n,1] = lo
+    verts[:,n:,1] = hi[:,::-1]
+
+    kwargs.setdefault ( 'colors', c )
+    bands = PolyCollection ( verts, edgecolors=edgecolors,
+            facecolors=facecolors, alpha=kwargs.get ( 'alpha', None ) )
+    lines = LineCollection ( segments, **kwargs )
+    if 'zorder' not in kwargs:
+        lines.set_zorder ( 2 )
+    ax.add_collection ( bands )
+    ax.add_collection ( lines )
+    ax.autoscale_view ()
+    return lines,bands
+
+def _band_buffer ( x ):
+    """Vertices of a closed error region along x
+
+    The region runs along the lower limit and back along the upper limit and
+    ends at its first vertex, so matplotlib uses the buffer without copying
+    it. The limits are filled in through _band_limits, after which the
+    region is closed by _close_band.
+    """
+    n = len(x)
+    band = np.zeros ( (2*n+1,2), 'd' )
+    band[:n,0] = x
+    band[n:2*n,0] = x[::-1]
+    return band
+
+def _close_band ( band ):
+    """Repeat the first vertex of band at its end"""
+    if len(band) > 1:
+        band[-1] = band[0]
+    return band
+
+def _band_limits ( band ):
+    """Views of the lower and upper limit in a _band_buffer"""
+    n = (len(band)-1)//2
+    return band[:n,1],band[n:2*n,1][::-1]
+
+def _fill ( ax, band, kwargs ):
+    """ax.fill of the vertices in band, without copying them"""
+    # Recent versions of Axes.add_patch find the data limits segment by
+    # segment, which takes seconds and hundreds of bytes per vertex for long
+    # bands. The patch is therefore added with a single vertex and the
+    # limits are updated from all vertices at once.
+    f = Polygon ( band[-1:], closed=True,
+            fill=kwargs.get ( 'fill', True ) )
+    f.update ( kwargs )
+    ax.add_patch ( f )
+    f.set_xy ( band )
+    ax.update_datalim ( band )
+    ax.autoscale_view ()
+    return [f]
+
+def _reduce_samples ( se, samples, cache=None ):
+    """Apply se to every row of samples"""
+    key = getattr ( se, 'cache_key', None )
+    if cache is not None and key is not None:
+        return cache.cached ( dvis.cache.array_key ( 'band', samples, key ),
+                lambda: _reduce_samples ( se, samples ) )
+    if getattr ( se, 'axis_aware', False ):
+        return se ( samples, axis=1 )
+    dtype = dvis.stats.float_dtype ( samples.dtype )
+    ye1,ye2 = np.zeros(samples.shape[0],dtype),np.zeros(samples.shape[0],dtype)
+    for i in range ( samples.shape[0] ):
+        ye1[i],ye2[i] = se(samples[i,:])
+    return ye1,ye2
+
 def Errorline_faded ( x, y, e, al, **kwargs ):
     """An Errorline that fades
 
     Similar to an Error line but fades out according to al.
     IMPORTANT: This line is going to be made up of lots of small lines and
-    small rectangular patches.
+    small rectangular patches. By default, these are collected in a single
+    LineCollection and a single PolyCollection.
 
     :Parameters:
         *x*
@@ -189,20 +640,57 @@ def Errorline_faded ( x, y, e, al, **kwargs ):
             of e
         *al*
             alpha values for the different line segments
-        *color*,*edgecolor*,*facecolor*,*ax*
+        *color*,*edgecolor*,*facecolor*
             see Errorline()
+        *ax*
+            target axes (defaults to gca())
+        *collection*
+            if True (default), draw all segments as one LineCollection and
+            all patches as one PolyCollection. Otherwise, every segment is a
+            separate Line2D and every patch a separate Polygon.
+
+    :Return:
+        a list of lines and a list of patches (each holding a single
+        collection if collection is True)
     """
     c = dvis.color.colorsequence ( kwargs.setdefault ( 'color', [0,0,0]))[0]
     kwargs.setdefault ( 'edgecolor', dvis.color.cmix ( c, 'w', 3 ) )
     kwargs.setdefault ( 'facecolor', dvis.color.cmix ( c, 'w', 1.5 ) )
-    ax = kwargs.setdefault ( 'ax', pl.gca() )
+    ax = kwargs.get ( 'ax', None )
+    if ax is None:
+        ax = _gca()
 
-    fade = pl.convolve ( [.5,.5], al, 'valid' )
+    fade = np.convolve ( [.5,.5], al, 'valid' )
     yup = y+e
     ydown = y-e
     n = len(fade)
+
+    if kwargs.setdefault ( 'collection', True ):
+        x = np.asarray ( x )
+        y = np.asarray ( y )
+        verts = np.empty ( (n,4,2), 'd' )
+        verts[:,:,0] = np.c_[x[:n],x[1:n+1],x[1:n+1],x[:n]]
+        verts[:,:,1] = np.c_[yup[:n],yup[1:n+1],ydown[1:n+1],ydown[:n]]
+        segments = np.empty ( (n,2,2), 'd' )
+        segments[:,:,0] = np.c_[x[:n],x[1:n+1]]
+        segments[:,:,1] = np.c_[y[:n],y[1:n+1]]
+
+        fc = np.empty ( (n,4), 'd' )
+        fc[:,:3] = dvis.color.colorsequence ( kwargs['facecolor'] )[0]
+        fc[:,3] = fade
+        lc = np.empty ( (n,4), 'd' )
+        lc[:,:3] = c
+        lc[:,3] = fade
+
+        f = PolyCollection ( verts, facecolors=fc, edgecolors='none' )
+        l = LineCollection ( segments, colors=lc )
+        ax.add_collection ( f )
+        ax.add_collection ( l )
+        ax.autoscale_view ()
+        return [l],[f]
+
     l,f = [],[]
-    for i in xrange ( n ):
+    for i in range ( n ):
         f += ax.fill (
                 [x[i],x[i+1],x[i+1],x[i]],
                 [yup[i],yup[i+1],ydown[i+1],ydown[i]],
@@ -211,64 +699,215 @@ def Errorline_faded ( x, y, e, al, **kwargs ):
 
     return l,f
 
+class StreamingErrorline ( object ):
+    """An Errorline that grows as points are appended
+
+    The line and the error region are kept in preallocated buffers that grow
+    by doubling. Appending points writes them to the buffers and updates the
+    existing Line2D and PathPatch in place. The error region is stored as
+    upper limits (reversed) followed by lower limits, so that it can grow at
+    both ends without moving the points that are already there.
+
+    :Parameters:
+        *x*,*y*,*e*
+            initial points (see append)
+        *ax*
+            target axes (defaults to gca())
+        *capacity*
+            initial number of points that fit into the buffers
+        *autoscale*
+            rescale the axes to include new points
+
+    :Optional Keyword Arguments:
+        *color*,*edgecolor*,*facecolor*
+            see Errorline()
+    """
+    def __init__ ( self, x=(), y=(), e=0., ax=None, capacity=1024,
+            autoscale=True, **kwargs ):
+        c = dvis.color.colorsequence ( kwargs.setdefault ( 'color', [0,0,0]))[0]
+        kwargs.setdefault ( 'edgecolor', dvis.color.cmix ( c, 'w', 3 ) )
+        kwargs.setdefault ( 'facecolor', dvis.color.cmix ( c, 'w', 1.5 ) )
+        if ax is None:
+            ax = _gca()
+        self.ax = ax
+        self.autoscale = autoscale
+        self.n = 0
+        self.capacity = 0
+        self._allocate ( max ( 1, capacity ) )
+
+        self.line = Line2D ( [], [], color=c )
+        self._path = Path ( self._band_vertices() )
+        self.patch = PathPatch ( self._path,
+                edgecolor=kwargs['edgecolor'], facecolor=kwargs['facecolor'] )
+        ax.add_patch ( self.patch )
+        ax.add_line ( self.line )
+        # Blitting needs a figure that has been drawn
+        self._drawn = False
+        ax.figure.canvas.mpl_connect ( 'draw_event', self._on_draw )
+        self.append ( x, y, e )
+
+    def _on_draw ( self, event ):
+        self._drawn = True
+
+    def append ( self, x, y, e=0., blit=False ):
+        """Append points to the line
+
+        :Parameters:
+            *x*,*y*
+                x and y values of the new points
+            *e*
+                error of the new points. This can be a scalar, one error per
+                point or a (2,n) array of lower and upper limits.
+            *blit*
+                if True, only the new part of the line is drawn and blitted
+                to the canvas. A full redraw is done if the axes limits
+                change or the axes have not been drawn before.
+        """
+        x = np.atleast_1d ( np.asarray ( x, 'd' ) )
+        y = np.atleast_1d ( np.asarray ( y, 'd' ) )
+        e = np.asarray ( e, 'd' )
+        if e.ndim == 2:
+            lo,hi = e[0],e[1]
+        else:
+            lo,hi = y-e,y+e
+        k = len(x)
+        if k == 0:
+            return
+        if self.n+k > self.capacity:
+            self._allocate ( max ( 2*self.capacity, self.n+k ) )
+
+        start,stop = self.n,self.n+k
+        c = self.capacity
+        self._line[start:stop,0] = x
+        self._line[start:stop,1] = y
+        self._band[c+start:c+stop,0] = x
+        self._band[c+start:c+stop,1] = lo
+        self._band[c-stop:c-start,0] = x[::-1]
+        self._band[c-stop:c-start,1] = hi[::-1]
+        self.n = stop
+        # Repeat the first vertex to close the region
+        self._band[c+stop] = self._band[c-stop]
+
+        self.line.set_data ( self._line[:stop,0], self._line[:stop,1] )
+        self._path.vertices = self._band_vertices()
+        self.patch.stale = True
+
+        limits = self.ax.get_xlim(),self.ax.get_ylim()
+        if self.autoscale:
+            self.ax.update_datalim ( np.c_[np.r_[x,x],np.r_[lo,hi]] )
+            self.ax.autoscale_view ()
+        if blit:
+            if limits == (self.ax.get_xlim(),self.ax.get_ylim()) and \
+                    self._drawn:
+                self._blit ( max ( 0, start-1 ) )
+            else:
+                self.ax.figure.canvas.draw ()
+
+    def _allocate ( self, capacity ):
+        line = np.empty ( (capacity,2), 'd' )
+        band = np.empty ( (2*capacity+1,2), 'd' )
+        if self.n:
+            c,n = self.capacity,self.n
+            line[:n] = self._line[:n]
+            band[capacity-n:capacity+n+1] = self._band[c-n:c+n+1]
+        self._line,self._band = line,band
+        self.capacity = capacity
+
+    def _band_vertices ( self ):
+        c,n = self.capacity,self.n
+        if n == 0:
+            return np.zeros ( (1,2), 'd' )
+        return self._band[c-n:c+n+1]
+
+    def _blit ( self, start ):
+        """Draw the points from start on over the current canvas"""
+        c,n = self.capacity,self.n
+        band = Polygon ( np.concatenate ( (self._band[c-n:c-start],
+            self._band[c+start:c+n]) ) )
+        band.update_from ( self.patch )
+        line = Line2D ( self._line[start:n,0], self._line[start:n,1] )
+        line.update_from ( self.line )
+        for a in (band,line):
+            a.set_figure ( self.ax.figure )
+            a.set_transform ( self.ax.transData )
+            self.ax.draw_artist ( a )
+        self.ax.figure.canvas.blit ( self.ax.bbox )
+
 #################################################################
 
 def calculate_boxplot_stats ( x, **kwargs ):
+    """Calculate the statistics for a single box
+
+    :Parameters:
+        *x*
+            values to be summarized
+
+    :Optional keyword arguments:
+        *whis*, *bootstrap*, *rng*
+            see dvis.stats.batch_boxplot_stats
+        *notch_ci*
+            precomputed notch limits
+        *weights*
+            weights of the values in x (see
+            dvis.stats.weighted_boxplot_stats)
+        *bins*
+            if given, x holds histogram counts and bins the bin edges (see
+            dvis.stats.histogram_boxplot_stats)
+        *cache*
+            a dvis.cache.StatsCache (or its directory) to look up and store
+            the statistics
+
+    :Return:
+        a dictionary with the keys 'main', 'fliers' and 'notch'
+    """
     whis = kwargs.setdefault ( 'whis', 1.5 )
     bootstrap = kwargs.setdefault ( 'bootstrap', None )
+    rng = kwargs.setdefault ( 'rng', None )
+    notch_ci = kwargs.setdefault ( 'notch_ci', None )
+    weights = kwargs.setdefault ( 'weights', None )
+    bins = kwargs.setdefault ( 'bins', None )
+    if notch_ci is not None:
+        bootstrap = None
 
-    # Get median and quartiles
-    q1,med,q3 = pl.prctile (x, [25,50,75] )
-    # Get high extreme
-    iq = q3-q1
-    hi_val = q3+whis*iq
-    wisk_hi = pl.compress ( x<=hi_val, x )
-    if len(wisk_hi)==0:
-        wisk_hi = q3
-    else:
-        wisk_hi = max(wisk_hi)
-    # Get low extreme
-    lo_val = q1-whis*iq
-    wisk_lo = pl.compress ( x>=lo_val, x )
-    if len(wisk_lo)==0:
-        wisk_lo = q3
-    else:
-        wisk_lo = min(wisk_lo)
-
-    # Get fliers
-    flier_hi = pl.compress ( x>wisk_hi, x )
-    flier_lo = pl.compress ( x<wisk_lo, x )
-
-    if bootstrap is not None:
-        # Do a bootstrap estimate of notch locations
-        def bootstrapMedian ( data, N=5000 ):
-            # determine 95% confidence intervals of the median
-            M = len(data)
-            percentile = [2.5,97.5]
-            estimate = pl.zeros(N)
-            for n in xrange (N):
-                bsIndex = pl.randint ( 0, M, M )
-                bsData = data[bsIndex]
-                estimate[n] = pl.prctile ( bsData, 50 )
-            CI = pl.prctile ( estimate, percentile )
-            return CI
-        CI = bootstrapMedian ( x, N=bootstrap )
-        notch_max = CI[1]
-        notch_min = CI[0]
+    def compute ():
+        if bins is not None:
+            return dvis.stats.histogram_boxplot_stats ( _flat ( x ), bins,
+                    whis=whis, bootstrap=bootstrap, rng=rng )
+        elif weights is not None:
+            return dvis.stats.weighted_boxplot_stats ( x, weights,
+                    whis=whis, bootstrap=bootstrap, rng=rng )
+        return dvis.stats.unpack_boxplot_stats (
+                *dvis.stats.batch_boxplot_stats ( _flat ( x ), whis=whis,
+                    bootstrap=bootstrap, rng=rng ) )[0]
+
+    cache = dvis.cache.get_cache ( kwargs.setdefault ( 'cache', None ) )
+    if cache is None:
+        stats = compute ()
     else:
-        # Estimate notch locations using Gaussian-based asymptotic
-        # approximation
-        #
-        # For discussion: McGill, R., Tukey, J.W., and
-        # Larsen, W.A. (1978) "Variations of Boxplots", The
-        # American Statistitian, 32:12-16
-        notch_max = med + 1.57*iq/pl.sqrt(len(x))
-        notch_min = med - 1.57*iq/pl.sqrt(len(x))
-    return {'main':(wisk_lo,q1,med,q3,wisk_hi),
-            'fliers':(flier_lo,flier_hi),
-            'notch':(notch_min,notch_max)}
+        stats = dict ( cache.cached ( _boxstats_key ( x, whis, bootstrap, rng,
+            weights, bins ), compute ) )
+    if notch_ci is not None:
+        stats['notch'] = tuple ( notch_ci )
+    return stats
+
+def _boxstats_key ( x, whis, bootstrap, rng, weights=None, bins=None ):
+    """Cache key of the statistics of a single box"""
+    if not isinstance ( rng, (int,np.integer) ):
+        rng = None
+    return dvis.cache.array_key ( 'boxplot', _flat ( x ), whis, bootstrap,
+            rng, None if weights is None else _flat ( weights ),
+            None if bins is None else _flat ( bins ) )
+
+def _flat ( x ):
+    """x as a 1-D array without copying columns and memory maps"""
+    return np.asarray ( x ).reshape ( -1 )
 
 class BoxplotArtist ( Artist ):
+    """A single Tufte box
+
+    The flier markers and the box lines are created once on the first draw.
+    Later draws only move the box vertices if the axes limits changed.
+    """
     def __init__ ( self, x, boxstats, offset, **kwargs ):
         Artist.__init__ ( self )
         self.x = x
@@ -278,87 +917,212 @@ class BoxplotArtist ( Artist ):
         self.color = kwargs.setdefault ( 'color', [0,0,0] )
         self.offset = offset
         self.lw    = kwargs.setdefault ( 'linewidth', 1 )
+        self._box = None
+        self._fliers = None
+        self._limits = None
 
+    @allow_rasterization
     def draw ( self, renderer, *args, **kwargs ):
         if not self.get_visible(): return
 
-        box,pt,dummy = self.make_box_plot()
-        dummy.draw(renderer)
-        pt.draw(renderer)
-        box.draw(renderer)
+        with dvis.profiling.timed ( self, 'draw' ):
+            box,pt = self.make_box_plot()
+            self.update_box_plot()
+            pt.draw(renderer)
+            box.draw(renderer)
+
+    def get_children ( self ):
+        return [a for a in (self._fliers,self._box) if a is not None]
+
+    def get_datalim ( self ):
+        """Data points that the axes should include to show the box"""
+        p = self.boxstats['main']
+        f_lo,f_hi = self.boxstats['fliers']
+        values = np.concatenate ( ([p[0],p[-1]],f_lo,f_hi) )
+        lim = [(self.x,min(values)),(self.x,max(values))]
+        if self.vert == 1:
+            lim = [(v,x) for x,v in lim]
+        return lim
 
     def make_box_plot (self):
+        """Create the sub-artists for flier markers and box lines (once)"""
+        if self._box is not None:
+            return self._box,self._fliers
+        with dvis.profiling.timed ( self, 'build' ) as timer:
+            pt = Line2D ( [], [], linestyle='none', marker='.',
+                    color=self.color,
+                    markersize=self.lw if self.vert==1 else 1 )
+            pt.set_transform ( self.axes.transData )
+            pt.set_clip_path ( self.axes.patch )
+
+            # Box vertices are x+ex*shift along the positions and value+ey*gap
+            # along the values, with ex,ey depending on the axes limits
+            if self.notch:
+                self._shift = np.array ( [[0,0],[1,1],[1,-1],[-1,1],[1,1],[0,0]] )
+                self._gap = np.array ( [[0,0],[0,0],[0,-1],[1,0],[0,0],[0,0]] )
+            else:
+                self._shift = np.array ( [[0,0],[1,1],[1,1],[0,0]] )
+                self._gap = np.array ( [[0,0],[0,-1],[1,0],[0,0]] )
+            nlines = self._shift.shape[0]
+            box = LineCollection (
+                    segments=np.zeros ( (nlines,2,2) ),
+                    linewidths=[self.lw]*nlines,
+                    colors=[self.color]*nlines )
+            box.set_transform ( self.axes.transData )
+            box.set_zorder(10)
+
+            for a in (pt,box):
+                a.set_figure ( self.figure )
+                a.set_animated ( self.get_animated() )
+            timer.children = 2
+        self._box,self._fliers = box,pt
+        self._set_geometry ()
+        return box,pt
+
+    def set_boxstats ( self, boxstats ):
+        """Replace the statistics and move the existing sub-artists"""
+        self.boxstats = boxstats
+        if self._box is not None:
+            self._set_geometry ()
+        self.stale = True
+
+    def set_animated ( self, animated ):
+        Artist.set_animated ( self, animated )
+        for a in self.get_children():
+            a.set_animated ( animated )
+
+    def _set_geometry ( self ):
+        """Flier positions and box values from the statistics"""
         x = self.x
+        f_lo,f_hi = self.boxstats['fliers']
+        f = np.concatenate ( (f_lo,f_hi) )
+        if self.vert==1:
+            self._fliers.set_data ( f, [x]*len(f) )
+        else:
+            self._fliers.set_data ( [x]*len(f), f )
+
+        p = self.boxstats['main']
+        n = self.boxstats['notch']
+        if self.notch:
+            self._values = np.array ( [[p[0],p[1]],[p[1],n[0]],[n[0],p[2]],
+                [p[2],n[1]],[n[1],p[3]],[p[3],p[4]]], 'd' )
+        else:
+            self._values = np.array ( [[p[0],p[1]],[p[1],p[2]],[p[2],p[3]],
+                [p[3],p[4]]], 'd' )
+        # Force update_box_plot to recompute the segments
+        self._limits = None
+
+    def update_box_plot (self):
+        """Move the box vertices if the axes limits changed"""
         rx = self.axes.get_xlim()
         ry = self.axes.get_ylim()
+        if (rx,ry) == self._limits:
+            return
+        self._limits = rx,ry
         ex = self.offset*(rx[1]-rx[0])
         ey = self.offset*(ry[1]-ry[0])
         if self.vert == 1:
             ex,ey = ey,ex
-        p = self.boxstats['main']
-        n = self.boxstats['notch']
-        f_lo,f_hi = self.boxstats['fliers']
-        if self.notch:
-            lines = [ [(x,p[0]),(x,p[1])],
-                    [(x+ex,p[1]),(x+ex,n[0])],
-                    [(x+ex,n[0]),(x-ex,p[2]-ey)],
-                    [(x-ex,p[2]+ey),(x+ex,n[1])],
-                    [(x+ex,n[1]),(x+ex,p[3])],
-                    [(x,p[3]),(x,p[4])] ]
-        else:
-            lines = [ [(x,p[0]),(x,p[1])],
-                    [(x+ex,p[1]),(x+ex,p[2]-ey)],
-                    [(x+ex,p[2]+ey),(x+ex,p[3])],
-                    [(x,p[3]),(x,p[4])] ]
-        lines = pl.array(lines)
-        if self.vert==1:
-            lines = pl.array([ pl.c_[l[:,1],l[:,0]] for l in lines ])
-            pt = self.axes.plot ( f_lo, [x]*len(f_lo), '.', color=self.color,
-                    markersize=self.lw ) + \
-                self.axes.plot ( f_hi, [x]*len(f_hi), '.', color=self.color,
-                    markersize=self.lw )
-            dummy = self.axes.plot ( [p[0],p[-1]],[x-ex,x+ex], '.', markersize=0 )
-        else:
-            pt = self.axes.plot ( [x]*len(f_lo), f_lo, '.', color=self.color,
-                    markersize=1 ) + \
-                self.axes.plot ( [x]*len(f_hi), f_hi, '.', color=self.color,
-                    markersize=1 )
-            dummy = self.axes.plot ( [x-ex,x+ex], [p[0],p[-1]], '.', markersize=0 )
-        box = LineCollection (
-                segments=lines,
-                linewidths=[self.lw]*lines.shape[0],
-                colors=[self.color]*lines.shape[0] )
-        box.set_transform ( self.axes.transData )
-        box.set_zorder(10)
-        return box, pt[0],dummy[0]
+        self._box.set_segments ( self.box_segments ( ex, ey ) )
+
+    def box_segments ( self, ex, ey ):
+        """Box line segments for position offset ex and median gap ey"""
+        lines = np.empty ( self._values.shape+(2,), 'd' )
+        pos,val = (1,0) if self.vert == 1 else (0,1)
+        lines[...,pos] = self.x+ex*self._shift
+        lines[...,val] = self._values+ey*self._gap
+        return lines
 
 
 class RangeFrameArtist (Artist):
-    def __init__ ( self, x, y, trim=False ):
+    """A Tufte range frame
+
+    The percentiles of the data are computed on first use and cached, so that
+    redraws only transform them to axes coordinates. Call set_data to replace
+    the data or follow to take the data from a collection. method and tol
+    select how the percentiles are computed (see dvis.stats.percentiles).
+
+    The ticks are placed at the percentiles of the data. An animated range
+    frame keeps the ticks of its first draw, because the axis is not
+    redrawn when blitting.
+    """
+    def __init__ ( self, x, y, trim=False, method='exact', tol=0.001 ):
         Artist.__init__(self)
+        self.trim = trim
+        self.method = method
+        self.tol = tol
+        self._range_lines = None
+        self._ticks_set = False
+        self._source = None
+        self.set_data ( x, y )
+
+    def set_data ( self, x, y ):
+        """Replace the data and invalidate the cached percentiles"""
         self.x = x
         self.y = y
-        self.trim = trim
+        self._prctiles = None
+        self.stale = True
+
+    def follow ( self, collection ):
+        """Take the data from the offsets of collection
+
+        The percentiles are recomputed on the next draw whenever
+        collection.set_offsets was called with a new array.
+        """
+        self._source = collection
+        self._source_offsets = collection.get_offsets()
+
+    def get_prctiles ( self ):
+        """Percentiles 0,25,50,75,100 of x and y (computed once)"""
+        if self._source is not None:
+            offsets = self._source.get_offsets()
+            if offsets is not self._source_offsets:
+                self._source_offsets = offsets
+                self.set_data ( offsets[:,0], offsets[:,1] )
+        if self._prctiles is None:
+            with dvis.profiling.timed ( self, 'stats' ):
+                self._prctiles = (self._trimmed_prctile ( self.x ),
+                        self._trimmed_prctile ( self.y ))
+            if not self.get_animated():
+                self._ticks_set = False
+        return self._prctiles
+
+    def _trimmed_prctile ( self, x ):
+        if self.trim:
+            return dvis.stats.trimmed_percentiles ( x, 1.5, self.method,
+                    self.tol )
+        return dvis.stats.percentiles ( x, [0,25,50,75,100], self.method,
+                self.tol )
 
+    def get_children ( self ):
+        return [] if self._range_lines is None else [self._range_lines]
+
+    @allow_rasterization
     def draw ( self, renderer, *args, **kwargs ):
         if not self.get_visible(): return
 
-        rf = self.make_range_frame()
-        rf.draw(renderer)
+        with dvis.profiling.timed ( self, 'draw' ):
+            rf = self.make_range_frame()
+            rf.draw(renderer)
+
+    def update_ticks ( self ):
+        """Place the ticks of the axes at the percentiles"""
+        px,py = self.get_prctiles()
+        self.axes.get_xaxis().tick_bottom()
+        self.axes.get_yaxis().tick_left()
+        self.axes.set_xticks(px)
+        self.axes.set_yticks(py)
+        self.axes.tick_params ( width=0 )
+        self._ticks_set = True
 
     def make_range_frame (self):
 
+        px,py = self.get_prctiles()
+        if not self._ticks_set:
+            self.update_ticks()
+
         rx = self.axes.get_xlim()
         ry = self.axes.get_ylim()
-        px = pl.prctile ( self.x )
-        py = pl.prctile ( self.y )
-
-        if self.trim:
-            if px[2]-px[0]>1.5*(px[3]-px[1]):
-                px[0] = self.x[self.x>px[2]-1.5*(px[3]-px[1])].min()
-            if px[4]-px[2]>1.5*(px[3]-px[1]):
-                px[4] = self.x[self.x<px[2]+1.5*(px[3]-px[1])].min()
-
         x = px-rx[0]
         x /= rx[1]-rx[0]
         y = py-ry[0]
@@ -377,18 +1141,20 @@ class RangeFrameArtist (Artist):
                 [(ex,y[2]+ey),(ex,y[3])],
                 [(0,y[3]),(0,y[4])]
                 ]
-        widths = [1,1,1,1]
-        range_lines = LineCollection(
-                segments=pl.clip(xline+yline,0,1),
-                linewidths=widths+widths,
-                colors=[[0]*3]*2*len(widths) )
-        range_lines.set_transform ( self.axes.transAxes )
-        range_lines.set_zorder(10)
+        segments = np.clip(xline+yline,0,1)
 
-        self.axes.get_xaxis().tick_bottom()
-        self.axes.get_yaxis().tick_left()
-        self.axes.set_xticks(px)
-        self.axes.set_yticks(py)
-        self.axes.tick_params ( width=0 )
+        if self._range_lines is None:
+            with dvis.profiling.timed ( self, 'build' ) as timer:
+                widths = [1,1,1,1]
+                self._range_lines = LineCollection(
+                        segments=segments,
+                        linewidths=widths+widths,
+                        colors=[[0]*3]*2*len(widths) )
+                self._range_lines.set_transform ( self.axes.transAxes )
+                self._range_lines.set_zorder(10)
+                self._range_lines.set_figure ( self.figure )
+                timer.children = 1
+        else:
+            self._range_lines.set_segments ( segments )
 
-        return range_lines
+        return self._range_lines
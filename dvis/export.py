@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+__doc__ = """Vector exports with rasterized dense layers
+
+Dense data layers (large scatter plots, long lines, error regions with many
+vertices, many boxplot fliers) make vector files huge. savefig rasterizes
+only these layers, while range frames, boxes, axes, ticks and text stay
+vectors.
+"""
+
+__all__ = ["savefig","data_layers","count_vertices"]
+
+from matplotlib.collections import Collection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+def savefig ( fig, fname, max_vertices=10000, dpi=300, **kwargs ):
+    """Save fig and rasterize data layers with more than max_vertices
+
+    :Parameters:
+        *fig*
+            the figure
+        *fname*
+            file name or file object (see matplotlib.figure.Figure.savefig)
+        *max_vertices*
+            data layers with more vertices than this are rasterized
+        *dpi*
+            resolution of the rasterized layers
+
+    :Optional Keyword Arguments:
+        are passed to fig.savefig
+
+    :Return:
+        a report with one dictionary per data layer that has the keys
+        'axes' (index in fig.axes), 'artist' (class name), 'label',
+        'vertices' and 'rasterized'. Layers that were rasterized before are
+        reported as rasterized and left alone.
+    """
+    report = []
+    changed = []
+    for i,ax in enumerate ( fig.axes ):
+        for layer in data_layers ( ax ):
+            n = count_vertices ( layer )
+            rasterize = n > max_vertices
+            if rasterize and not layer.get_rasterized():
+                layer.set_rasterized ( True )
+                changed.append ( layer )
+            report.append ( {'axes':i, 'artist':type(layer).__name__,
+                'label':layer.get_label(), 'vertices':n,
+                'rasterized':bool ( layer.get_rasterized() )} )
+    try:
+        fig.savefig ( fname, dpi=dpi, **kwargs )
+    finally:
+        for layer in changed:
+            layer.set_rasterized ( False )
+    return report
+
+def data_layers ( ax ):
+    """Artists of ax that show data and may be rasterized
+
+    These are the lines, collections and patches of ax and the fliers of
+    the boxes of dvis.Boxplot.
+    """
+    import dvis.customized
+    layers = list ( ax.lines )+list ( ax.collections )+list ( ax.patches )
+    for artist in ax.artists:
+        if isinstance ( artist, dvis.customized.BoxplotArtist ):
+            box,fliers = artist.make_box_plot()
+            layers.append ( fliers )
+    return layers
+
+def count_vertices ( artist ):
+    """Number of vertices that a vector backend writes for artist
+
+    For collections, every offset counts as a copy of the paths.
+    """
+    if isinstance ( artist, Line2D ):
+        return len ( artist.get_xydata() )
+    if isinstance ( artist, Collection ):
+        paths = artist.get_paths()
+        if not len(paths):
+            return 0
+        n = sum ( [len(p.vertices) for p in paths] )
+        offsets = artist.get_offsets()
+        if offsets is not None and len(offsets) > len(paths):
+            n = n*len(offsets)//len(paths)
+        return n
+    if isinstance ( artist, Patch ):
+        return len ( artist.get_path().vertices )
+    return 0
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+__doc__ = """Level of detail reduction for large data sets
+
+The functions in this module reduce data to what can actually be seen on the
+target axes. The LineLOD and ScatterLOD controllers keep the full data and
+recompute the reduced data whenever the view limits of their axes change.
+"""
+
+__all__ = ["minmax_decimate","lttb","bin_points"]
+
+import numpy as np
+from matplotlib.image import AxesImage
+
+def minmax_decimate ( x, y, nbuckets, xlim=None ):
+    """Reduce a line to the first, minimum, maximum and last point per bucket
+
+    :Parameters:
+        *x*
+            increasing x values
+        *y*
+            y values
+        *nbuckets*
+            number of buckets (typically the width of the axes in pixels)
+        *xlim*
+            only points in this range (plus their neighbours outside) are
+            kept (Default: the whole range of x)
+
+    :Return:
+        the reduced x and y values
+    """
+    x,y,starts = _buckets ( x, y, nbuckets, xlim )
+    if starts is None:
+        return x,y
+    stops = np.r_[starts[1:],len(x)]
+    index = np.arange ( len(x) )
+    size = np.diff ( np.r_[starts,len(x)] )
+    ymin = np.minimum.reduceat ( y, starts )
+    ymax = np.maximum.reduceat ( y, starts )
+    imin = np.minimum.reduceat (
+            np.where ( y==np.repeat ( ymin, size ), index, len(x) ), starts )
+    imax = np.minimum.reduceat (
+            np.where ( y==np.repeat ( ymax, size ), index, len(x) ), starts )
+    keep = np.sort ( np.c_[starts,imin,imax,stops-1], 1 ).ravel()
+    return x[keep],y[keep]
+
+def minmax_band ( x, lo, hi, nbuckets, xlim=None ):
+    """Reduce an error region to the envelope of the buckets
+
+    :Return:
+        x values, lower and upper limits with two points per bucket
+    """
+    x,lohi,starts = _buckets ( x, np.c_[lo,hi], nbuckets, xlim )
+    if starts is None:
+        return x,lohi[:,0],lohi[:,1]
+    stops = np.r_[starts[1:],len(x)]
+    lo = np.repeat ( np.minimum.reduceat ( lohi[:,0], starts ), 2 )
+    hi = np.repeat ( np.maximum.reduceat ( lohi[:,1], starts ), 2 )
+    return np.c_[x[starts],x[stops-1]].ravel(),lo,hi
+
+def lttb ( x, y, nout, xlim=None ):
+    """Largest triangle three buckets downsampling
+
+    Steinarsson, S. (2013) "Downsampling Time Series for Visual
+    Representation", MSc thesis, University of Iceland
+
+    :Parameters:
+        *x*
+            increasing x values
+        *y*
+            y values
+        *nout*
+            number of points to keep
+        *xlim*
+            only points in this range (plus their neighbours outside) are
+            kept (Default: the whole range of x)
+    """
+    x,y = _view ( np.asarray ( x ), np.asarray ( y ), xlim )
+    n = len(x)
+    if nout >= n or nout < 3:
+        return x,y
+    every = (n-2)/float(nout-2)
+    keep = np.empty ( nout, int )
+    keep[0],keep[-1] = 0,n-1
+    for i in range ( nout-2 ):
+        lo,hi = int(i*every)+1,int((i+1)*every)+1
+        nxt = slice ( hi, min ( int((i+2)*every)+1, n ) )
+        cx,cy = x[nxt].mean(),y[nxt].mean()
+        ax,ay = x[keep[i]],y[keep[i]]
+        area = np.abs ( (ax-cx)*(y[lo:hi]-ay) - (ax-x[lo:hi])*(cy-ay) )
+        keep[i+1] = lo+np.argmax ( area )
+    return x[keep],y[keep]
+
+def bin_points ( x, y, xlim, ylim, shape ):
+    """Bin points on a regular grid
+
+    :Parameters:
+        *x,y*
+            coordinates of the points
+        *xlim,ylim*
+            range of the grid
+        *shape*
+            number of bins in x and y direction
+
+    :Return:
+        index of one representative point per occupied bin, the number of
+        points in these bins and the full array of bin counts (with shape
+        shape[::-1], suitable for imshow)
+    """
+    nx,ny = shape
+    ix = np.floor ( (np.asarray(x)-xlim[0])*(nx/float(xlim[1]-xlim[0])) )
+    iy = np.floor ( (np.asarray(y)-ylim[0])*(ny/float(ylim[1]-ylim[0])) )
+    inside = np.flatnonzero ( (ix>=0) & (ix<nx) & (iy>=0) & (iy<ny) )
+    bins = (iy[inside]*nx+ix[inside]).astype ( int )
+    occupied,first,counts = np.unique ( bins, return_index=True,
+            return_counts=True )
+    image = np.zeros ( nx*ny, int )
+    image[occupied] = counts
+    return inside[first],counts,image.reshape ( (ny,nx) )
+
+def _view ( x, y, xlim ):
+    """Points within xlim plus one neighbour on either side"""
+    if xlim is None:
+        return x,y
+    lo = max ( 0, np.searchsorted ( x, min(xlim), 'left' )-1 )
+    hi = np.searchsorted ( x, max(xlim), 'right' )+1
+    return x[lo:hi],y[lo:hi]
+
+def _buckets ( x, y, nbuckets, xlim ):
+    """Start indices of nbuckets equally wide buckets of the points in view"""
+    x,y = _view ( np.asarray ( x ), np.asarray ( y ), xlim )
+    if len(x) <= 4*nbuckets:
+        return x,y,None
+    edges = np.linspace ( x[0], x[-1], nbuckets+1 )[:-1]
+    starts = np.unique ( np.searchsorted ( x, edges, 'left' ) )
+    return x,y,starts
+
+#################################################################
+
+class LineLOD ( object ):
+    """Keep a reduced line (and error region) in sync with the view
+
+    :Parameters:
+        *ax*
+            axes that show the line
+        *x,y*
+            full data (x has to be increasing)
+        *lo,hi*
+            full lower and upper limits of the error region (optional)
+        *method*
+            'minmax' or 'lttb'
+        *nbuckets*
+            number of buckets (Default: width of the axes in pixels)
+    """
+    def __init__ ( self, ax, x, y, lo=None, hi=None, method='minmax',
+            nbuckets=None ):
+        self.ax = ax
+        self.x,self.y = np.asarray ( x ),np.asarray ( y )
+        self.lo,self.hi = lo,hi
+        self.line,self.patch = None,None
+        self.method = method
+        self.nbuckets = nbuckets
+
+    def attach ( self, line, patch=None ):
+        """Show the reduced data in line (Line2D) and patch (Polygon)
+
+        line and patch are updated whenever the x limits of the axes change.
+        """
+        self.line,self.patch = line,patch
+        self.ax.callbacks.connect ( 'xlim_changed', lambda ax: self.update() )
+
+    def reduce ( self, xlim=None ):
+        """Reduced line and error region polygon for the view xlim"""
+        n = self.nbuckets or max ( 1, int ( self.ax.bbox.width ) )
+        if self.method == 'lttb':
+            line = lttb ( self.x, self.y, 4*n, xlim )
+        else:
+            line = minmax_decimate ( self.x, self.y, n, xlim )
+        band = None
+        if self.lo is not None:
+            xb,lo,hi = minmax_band ( self.x, self.lo, self.hi, n, xlim )
+            band = np.c_[np.r_[xb,xb[::-1]],np.r_[lo,hi[::-1]]]
+        return line,band
+
+    def update ( self ):
+        """Recompute the reduced data for the current view"""
+        line,band = self.reduce ( self.ax.get_xlim() )
+        self.line.set_data ( *line )
+        if band is not None and self.patch is not None:
+            self.patch.set_xy ( band )
+
+class ScatterLOD ( object ):
+    """Keep a reduced scatter plot in sync with the view
+
+    Points are binned on a grid with cells of binsize pixels and only one
+    point per occupied cell is shown. If more than maxpoints cells are
+    occupied, the counts are shown as an image instead.
+
+    :Parameters:
+        *ax*
+            axes that show the points
+        *x,y*
+            full data
+        *collection*
+            PathCollection returned by scatter
+        *binsize*
+            size of a cell in pixels
+        *maxpoints*
+            maximum number of points to show before switching to an image
+        *cmap*
+            colormap for the image
+    """
+    def __init__ ( self, ax, x, y, collection, binsize=2, maxpoints=20000,
+            cmap='Greys' ):
+        self.ax = ax
+        self.x,self.y = np.asarray ( x ),np.asarray ( y )
+        self.collection = collection
+        self.binsize = binsize
+        self.maxpoints = maxpoints
+        # Per point properties have to be reduced with the points
+        self._props = {}
+        n = len(self.x)
+        for name in ('array','sizes','facecolors','edgecolors'):
+            value = getattr ( collection, 'get_'+name )()
+            if value is not None and len(value) == n and n > 1:
+                self._props[name] = value
+        # The image always covers the current view
+        self.image = AxesImage ( ax, cmap=cmap, origin='lower',
+                interpolation='nearest', extent=(0,1,0,1),
+                transform=ax.transAxes )
+        self.image.set_zorder ( collection.get_zorder() )
+        self.image.set_data ( np.zeros ( (1,1) ) )
+        ax.add_image ( self.image )
+        self.image.set_visible ( False )
+        self.update ()
+        ax.callbacks.connect ( 'xlim_changed', lambda ax: self.update() )
+        ax.callbacks.connect ( 'ylim_changed', lambda ax: self.update() )
+
+    def update ( self ):
+        """Recompute the reduced data for the current view"""
+        xlim,ylim = self.ax.get_xlim(),self.ax.get_ylim()
+        shape = (max ( 1, int ( self.ax.bbox.width/self.binsize ) ),
+                max ( 1, int ( self.ax.bbox.height/self.binsize ) ))
+        index,counts,image = bin_points ( self.x, self.y, xlim, ylim, shape )
+        if len(index) > self.maxpoints:
+            self.image.set_data ( np.log1p ( image ) )
+            self.image.autoscale ()
+            self.image.set_visible ( True )
+            self.collection.set_visible ( False )
+            return
+        self.image.set_visible ( False )
+        self.collection.set_visible ( True )
+        self.collection.set_offsets ( np.c_[self.x[index],self.y[index]] )
+        for name,value in self._props.items():
+            getattr ( self.collection, 'set_'+name ) ( value[index] )
@@ -2,11 +2,9 @@
 
 __doc__ = """Prepare a figure for plotting"""
 
-__all__ = ["prepare_axes","axes_grid"]
+__all__ = ["prepare_axes","axes_grid","AxesGridTemplate","agg_figure"]
 
-import pylab as pl
-import mpl_toolkits.axes_grid as agrid
-import mpl_toolkits.axes_grid.axes_size as Size
+import numpy as np
 import re
 
 import warnings
@@ -31,15 +29,10 @@ def prepare_axes ( ax, haveon=('b','l'), out=10 ):
     """
     if getattr(ax, '__iter__', False ):
         return [prepare_axes ( ax_, haveon ) for ax_ in ax]
-    # Complete haveon
-    splon = []
-    for loc in haveon:
-        m = re.search ( loc+".*", "bottom\nleft\nright\ntop\n" )
-        if not m is None:
-            splon.append ( m.group(0) )
+    splon = _complete_spines ( tuple(haveon) )
 
     if getattr ( ax, 'spines', False ):
-        for loc,spine in ax.spines.iteritems():
+        for loc,spine in ax.spines.items():
             if loc in splon:
                 spine.set_position ( ('outward', out) )
             else:
@@ -66,6 +59,39 @@ def prepare_axes ( ax, haveon=('b','l'), out=10 ):
 
     return ax
 
+def agg_figure ( figsize=None, dpi=None, **kwargs ):
+    """A figure that renders with the Agg canvas and is unknown to pyplot
+
+    Such figures can be created, plotted on and saved in any thread (see
+    the documentation of dvis). Use fig.savefig to write them.
+
+    :Parameters:
+        *figsize*
+            figure size in inches (Default: rcParams['figure.figsize'])
+        *dpi*
+            resolution (Default: rcParams['figure.dpi'])
+
+    :Optional Keyword Arguments:
+        are passed to matplotlib.figure.Figure
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure ( figsize=figsize, dpi=dpi, **kwargs )
+    FigureCanvasAgg ( fig )
+    return fig
+
+_spines = {}
+def _complete_spines ( haveon ):
+    """Complete abbreviated spine locations in haveon (cached)"""
+    if haveon not in _spines:
+        splon = []
+        for loc in haveon:
+            m = re.search ( loc+".*", "bottom\nleft\nright\ntop\n" )
+            if not m is None:
+                splon.append ( m.group(0) )
+        _spines[haveon] = splon
+    return _spines[haveon]
+
 def axes_grid ( naxes, **kwargs ):
     """shortcut to the axes grid of pylab
 
@@ -109,48 +135,104 @@ def axes_grid ( naxes, **kwargs ):
         an array of axes objects with shape naxes
     """
 
-    # Parsing input and setting defaults
-    fig   = kwargs.setdefault ( 'fig', pl.gcf() )
-    rect  = kwargs.setdefault ( 'rect', [.05,.05,.9,.9] )
-    horz  = kwargs.setdefault ( 'horz',
-            [Size.Scaled(1.) for i in xrange(naxes[0])] )
-    vert  = kwargs.setdefault ( 'vert',
-            [Size.Scaled(1.) for i in xrange(naxes[1])] )
-    hdist = kwargs.setdefault ( 'hdist', 0.2 )
-    vdist = kwargs.setdefault ( 'vdist', 0.2 )
-
-    if getattr(hdist,'__iter__',False) or hdist>0:
-        if not getattr(hdist,'__iter__',False):
-            hdist = [hdist]
-        for i in xrange ( naxes[0]-1 ):
-            horz.insert ( 2*i+1, Size.Fixed(hdist[i%len(hdist)]) )
-        hslice = slice ( 0, len(horz), 2 )
-    else:
-        hslice = slice ( 0, len(horz) )
-    if getattr(vdist,'__iter__',False) or vdist>0:
-        if not getattr(vdist,'__iter__',False):
-            vdist = [vdist]
-        for i in xrange ( naxes[1]-1 ):
-            vert.insert ( 2*i+1, Size.Fixed(vdist[i%len(vdist)]) )
-        vslice = slice ( 0, len(vert), 2 )
-    else:
-        vslice = slice ( 0, len(vert) )
-
-    nx  = kwargs.setdefault ( 'nx',  pl.mgrid[hslice,vslice][0] )
-    ny  = kwargs.setdefault ( 'ny',  pl.mgrid[hslice,vslice][1] )
-    nx1 = kwargs.setdefault ( 'nx1', pl.array([[None]*naxes[1]]*naxes[0]) )
-    ny1 = kwargs.setdefault ( 'ny1', pl.array([[None]*naxes[1]]*naxes[0]) )
-
-    # This is actually placing the axes
-    divider = agrid.Divider ( fig, rect, horz, vert, aspect=False )
-    ax = pl.array([ fig.add_axes ( rect, label='%d'%i ) \
-            for i in xrange ( naxes[0]*naxes[1] ) ])
-    ax.shape = naxes
-    for i in xrange ( naxes[0] ):
-        for j in xrange ( naxes[1] ):
-            # print nx[i,j],ny[i,j]
-            ax[i,j].set_axes_locator(
-                    divider.new_locator(nx=nx[i,j],nx1=nx1[i,j],
-                        ny=ny[i,j],ny1=ny1[i,j])
-                    )
-    return ax
+    if kwargs.get ( 'fig', None ) is None:
+        import matplotlib.pyplot
+        kwargs['fig'] = matplotlib.pyplot.gcf()
+    fig = kwargs.pop ( 'fig' )
+    return AxesGridTemplate ( naxes, **kwargs ).stamp ( fig )
+
+class AxesGridTemplate ( object ):
+    """A reusable axes_grid layout
+
+    The cell sizes and the locator indices of the layout are computed once.
+    stamp places the axes on a figure, which only needs a new Divider and
+    its locators. reset clears stamped axes so that a figure can be reused
+    for the next plot without creating new axes.
+
+    :Parameters:
+        *naxes*
+            a tuple of x,y counts of axes to be generated
+        *haveon*
+            if not None, every stamped axes is prepared with
+            prepare_axes(ax,haveon,out)
+        *out*
+            see prepare_axes
+
+    :Optional Keyword Arguments:
+        *rect*,*horz*,*hdist*,*vert*,*vdist*,*nx*,*ny*,*nx1*,*ny1*
+            see axes_grid
+    """
+    def __init__ ( self, naxes, haveon=None, out=10, **kwargs ):
+        import mpl_toolkits.axes_grid1.axes_size as Size
+
+        self.naxes = tuple ( naxes )
+        self.haveon = haveon
+        self.out = out
+
+        # Parsing input and setting defaults
+        rect  = kwargs.setdefault ( 'rect', [.05,.05,.9,.9] )
+        horz  = list ( kwargs.setdefault ( 'horz',
+                [Size.Scaled(1.) for i in range(naxes[0])] ) )
+        vert  = list ( kwargs.setdefault ( 'vert',
+                [Size.Scaled(1.) for i in range(naxes[1])] ) )
+        hdist = kwargs.setdefault ( 'hdist', 0.2 )
+        vdist = kwargs.setdefault ( 'vdist', 0.2 )
+
+        if getattr(hdist,'__iter__',False) or hdist>0:
+            if not getattr(hdist,'__iter__',False):
+                hdist = [hdist]
+            for i in range ( naxes[0]-1 ):
+                horz.insert ( 2*i+1, Size.Fixed(hdist[i%len(hdist)]) )
+            hslice = slice ( 0, len(horz), 2 )
+        else:
+            hslice = slice ( 0, len(horz) )
+        if getattr(vdist,'__iter__',False) or vdist>0:
+            if not getattr(vdist,'__iter__',False):
+                vdist = [vdist]
+            for i in range ( naxes[1]-1 ):
+                vert.insert ( 2*i+1, Size.Fixed(vdist[i%len(vdist)]) )
+            vslice = slice ( 0, len(vert), 2 )
+        else:
+            vslice = slice ( 0, len(vert) )
+
+        nx  = kwargs.setdefault ( 'nx',  np.mgrid[hslice,vslice][0] )
+        ny  = kwargs.setdefault ( 'ny',  np.mgrid[hslice,vslice][1] )
+        nx1 = kwargs.setdefault ( 'nx1', np.array([[None]*naxes[1]]*naxes[0]) )
+        ny1 = kwargs.setdefault ( 'ny1', np.array([[None]*naxes[1]]*naxes[0]) )
+
+        self.rect = rect
+        self.horz = horz
+        self.vert = vert
+        self.locations = [((i,j),dict(nx=nx[i,j],nx1=nx1[i,j],
+            ny=ny[i,j],ny1=ny1[i,j]))
+            for i in range ( naxes[0] ) for j in range ( naxes[1] )]
+
+    def stamp ( self, fig ):
+        """Place the axes of the layout on fig
+
+        :Return:
+            an array of axes objects with shape naxes
+        """
+        from mpl_toolkits.axes_grid1 import Divider
+
+        # This is actually placing the axes
+        divider = Divider ( fig, self.rect, self.horz, self.vert, aspect=False )
+        ax = np.empty ( self.naxes, object )
+        for k,(index,location) in enumerate ( self.locations ):
+            ax[index] = fig.add_axes ( self.rect, label='%d'%k )
+            ax[index].set_axes_locator ( divider.new_locator ( **location ) )
+            if self.haveon is not None:
+                prepare_axes ( ax[index], self.haveon, self.out )
+        return ax
+
+    def reset ( self, ax ):
+        """Remove all artists from stamped axes so they can be reused
+
+        :Return:
+            ax
+        """
+        for ax_ in np.ravel ( ax ):
+            ax_.cla()
+            if self.haveon is not None:
+                prepare_axes ( ax_, self.haveon, self.out )
+        return ax
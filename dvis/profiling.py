@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+__doc__ = """Opt-in timing of the dvis artists
+
+The custom artists time the phases in which they compute statistics
+('stats'), create their sub-artists ('build') and render ('draw'). Nothing
+is recorded unless a profile is active in the current thread:
+
+    with dvis.profile () as prof:
+        fig.savefig ( 'report.pdf' )
+    for record in prof.slowest ( 5 ):
+        print ( record )
+
+Every record is a dictionary with the keys 'artist' (class name), 'id'
+(of the artist), 'figure' (label of the figure or, if it has none, its id),
+'phase', 'seconds', 'children' (number of sub-artists created) and
+'thread'. Phases can be nested: a draw includes the build and stats phases
+that it triggers.
+"""
+
+__all__ = ["profile","Profile"]
+
+import threading
+import time
+from contextlib import contextmanager
+
+_clock = getattr ( time, 'perf_counter', time.time )
+_local = threading.local ()
+
+class Profile ( object ):
+    """Records of one profiling session
+
+    :Parameters:
+        *callback*
+            called with every record as soon as it is added
+    """
+    def __init__ ( self, callback=None ):
+        self.records = []
+        self.callback = callback
+
+    def add ( self, record ):
+        self.records.append ( record )
+        if self.callback is not None:
+            self.callback ( record )
+
+    def slowest ( self, n=10, phase='draw' ):
+        """The n slowest records of phase (or of all phases if None)"""
+        records = [r for r in self.records
+                if phase is None or r['phase'] == phase]
+        records.sort ( key=lambda r: -r['seconds'] )
+        return records[:n]
+
+    def summary ( self, by=('figure','artist','phase') ):
+        """Total time, number of calls and sub-artists per group
+
+        :Parameters:
+            *by*
+                record keys to group by
+
+        :Return:
+            a dictionary that maps tuples of the values of by to
+            dictionaries with the keys 'calls', 'seconds' and 'children'
+        """
+        groups = {}
+        for r in self.records:
+            g = groups.setdefault ( tuple ( [r[k] for k in by] ),
+                    {'calls':0, 'seconds':0., 'children':0} )
+            g['calls'] += 1
+            g['seconds'] += r['seconds']
+            g['children'] += r['children']
+        return groups
+
+@contextmanager
+def profile ( callback=None ):
+    """Record the dvis artists in the current thread
+
+    :Parameters:
+        *callback*
+            called with every record as soon as it is available
+
+    :Return:
+        a context manager that gives the Profile
+    """
+    prof = Profile ( callback )
+    recorders = _recorders ()
+    recorders.append ( prof )
+    try:
+        yield prof
+    finally:
+        recorders.remove ( prof )
+
+def _recorders ():
+    try:
+        return _local.recorders
+    except AttributeError:
+        _local.recorders = []
+        return _local.recorders
+
+class _Timer ( object ):
+    __slots__ = ('owner','phase','name','children','start')
+
+    def __init__ ( self, owner, phase, name ):
+        self.owner = owner
+        self.phase = phase
+        self.name = name
+        self.children = 0
+
+    def __enter__ ( self ):
+        self.start = _clock ()
+        return self
+
+    def __exit__ ( self, *exc ):
+        seconds = _clock ()-self.start
+        owner = self.owner
+        fig = getattr ( owner, 'figure', None )
+        if fig is not None:
+            fig = fig.get_label () or id(fig)
+        record = {'artist':self.name or type(owner).__name__, 'id':id(owner),
+                'figure':fig, 'phase':self.phase, 'seconds':seconds,
+                'children':self.children,
+                'thread':threading.current_thread().name}
+        for prof in list ( _local.recorders ):
+            prof.add ( record )
+
+class _NullTimer ( object ):
+    children = 0
+
+    def __enter__ ( self ):
+        return self
+
+    def __exit__ ( self, *exc ):
+        pass
+
+_null_timer = _NullTimer ()
+
+def timed ( owner, phase, name=None ):
+    """Context manager that times phase of owner if a profile is active
+
+    The record is named after the class of owner unless name is given. Set
+    the children attribute of the returned object to the number of
+    sub-artists that were created.
+    """
+    if getattr ( _local, 'recorders', None ):
+        return _Timer ( owner, phase, name )
+    return _null_timer
@@ -0,0 +1,849 @@
+#!/usr/bin/env python
+
+__doc__ = """Summary statistics for the dvis data displays"""
+
+__all__ = ["bootstrap_median_ci","batch_boxplot_stats","unpack_boxplot_stats",
+        "streaming_boxplot_stats","QuantileSketch",
+        "weighted_boxplot_stats","histogram_boxplot_stats",
+        "percentiles","trimmed_percentiles","binned_kde",
+        "sem_band","percentile_band","bootstrap_band"]
+
+import hashlib
+
+import numpy as np
+
+boxstats_dtype = np.dtype ( [
+    ('n','i8'),
+    ('wisk_lo','f8'), ('q1','f8'), ('med','f8'), ('q3','f8'), ('wisk_hi','f8'),
+    ('notch_min','f8'), ('notch_max','f8'),
+    ('flier_offset','i8'), ('nflier_lo','i8'), ('nflier_hi','i8') ] )
+
+def bootstrap_median_ci ( x, N=5000, percentile=(2.5,97.5), rng=None,
+        blocksize=2**22 ):
+    """Bootstrap confidence intervals for the median
+
+    The resamples are drawn in blocks of at most blocksize values, and the
+    medians of a block are determined by a single partition of the block.
+
+    :Parameters:
+        *x*
+            a sample or a sequence of samples (one per group)
+        *N*
+            number of bootstrap resamples
+        *percentile*
+            percentiles of the bootstrap distribution that give the
+            interval limits
+        *rng*
+            a numpy.random.Generator (or RandomState) or a seed. With a
+            seed, every sample is resampled by its own generator, which is
+            seeded with the seed and the values of the sample. The interval
+            of a sample then neither depends on the other samples nor is
+            correlated with the intervals of other samples.
+        *blocksize*
+            maximum number of resampled values to hold in memory at once
+
+    :Return:
+        an array of shape (2,) with the interval limits for a single sample,
+        or an array of shape (ngroups,2) for a sequence of samples
+    """
+    if len(x) and hasattr ( x[0], '__len__' ):
+        x = [np.asarray(x_).ravel() for x_ in x]
+        if isinstance ( rng, (int,np.integer) ):
+            rngs = [sample_rng ( rng, x_ ) for x_ in x]
+        else:
+            rngs = [get_rng ( rng )]*len(x)
+        return np.array ( [_bootstrap_median_ci ( x_, N, percentile, rng_,
+            blocksize ) for x_,rng_ in zip ( x, rngs )] )
+    x = np.asarray(x).ravel()
+    if isinstance ( rng, (int,np.integer) ):
+        rng = sample_rng ( rng, x )
+    return _bootstrap_median_ci ( x, N, percentile, get_rng ( rng ),
+            blocksize )
+
+def get_rng ( rng=None ):
+    """Turn rng into a random number generator
+
+    None and integers are used to seed a new numpy.random.Generator (or a
+    RandomState if numpy is too old to have Generators), everything else is
+    returned as is.
+    """
+    if rng is None or isinstance ( rng, (int,np.integer) ):
+        return getattr ( np.random, 'default_rng', np.random.RandomState ) ( rng )
+    return rng
+
+def sample_rng ( seed, *samples ):
+    """A random number generator derived from seed and the values of samples
+
+    Different samples get independent streams, while the same sample and
+    seed always give the same stream.
+    """
+    h = hashlib.sha1 ( repr ( int ( seed ) ).encode() )
+    for x in samples:
+        x = np.ascontiguousarray ( x )
+        h.update ( repr ( (x.dtype.str,x.shape) ).encode() )
+        h.update ( x.data )
+    key = np.frombuffer ( h.digest()[:16], np.uint32 )
+    return getattr ( np.random, 'default_rng', np.random.RandomState ) ( key )
+
+def _integers ( rng, high, size ):
+    if hasattr ( rng, 'integers' ):
+        return rng.integers ( 0, high, size )
+    return rng.randint ( 0, high, size )
+
+def _uniform ( rng, size ):
+    if hasattr ( rng, 'integers' ):
+        return rng.random ( size )
+    return rng.random_sample ( size )
+
+def _bootstrap_median_ci ( x, N, percentile, rng, blocksize ):
+    M = len(x)
+    if M == 0:
+        return np.array ( [np.nan,np.nan] )
+    kth = sorted ( set ( ((M-1)//2, M//2) ) )
+    estimate = np.empty ( N, 'd' )
+    rows = max ( 1, blocksize//M )
+    for start in range ( 0, N, rows ):
+        stop = min ( N, start+rows )
+        bsData = x[_integers ( rng, M, (stop-start,M) )]
+        bsData.partition ( kth, axis=1 )
+        estimate[start:stop] = 0.5*(bsData[:,(M-1)//2]+bsData[:,M//2])
+    return np.percentile ( estimate, percentile )
+
+def batch_boxplot_stats ( x, whis=1.5, bootstrap=None, rng=None ):
+    """Calculate boxplot statistics for all groups at once
+
+    :Parameters:
+        *x*
+            the groups to be summarized. This can be a 2-D array with one
+            group per column, a masked array with one group per column or a
+            sequence of (possibly differently sized) samples. Missing values
+            (masked or nan) are ignored.
+        *whis*
+            whiskers extend to the most extreme data point within whis
+            interquartile ranges from the box
+        *bootstrap*
+            number of bootstrap resamples for the notches. If None, the
+            notches are determined from a Gaussian approximation.
+        *rng*
+            random number generator or seed for the bootstrap
+
+    :Return:
+        a tuple (stats,fliers). stats is a structured array with one
+        entry per group (see boxstats_dtype) and fliers is a flat array that
+        holds the low fliers of group i at
+        fliers[flier_offset:flier_offset+nflier_lo] followed by its high
+        fliers.
+
+    Sequences of samples with very different sizes are summarized in
+    buckets of similar size, so that padding never takes more than about
+    twice the memory of the samples.
+    """
+    if not isinstance ( x, np.ndarray ):
+        x = list ( x )
+    buckets = _size_buckets ( x )
+    if buckets is not None:
+        return _merge_buckets ( [(index,batch_boxplot_stats (
+            [x[i] for i in index], whis, bootstrap, rng )) for index in buckets],
+            len(x) )
+    data = pad_groups ( x, copy=True )
+    data.sort ( axis=0 )
+    ngroups = data.shape[1]
+    cols = np.arange ( ngroups )
+    n = np.sum ( ~np.isnan ( data ), 0 )
+
+    stats = np.zeros ( ngroups, boxstats_dtype )
+    stats['n'] = n
+    q1,med,q3 = [_sorted_percentile ( data, n, p ) for p in (25,50,75)]
+    iq = q3-q1
+
+    # Whiskers are the most extreme data points within whis*iq of the box;
+    # nans are sorted to the end and never compare as inside.
+    nlo = np.sum ( data<(q1-whis*iq), 0 )
+    nhi = np.sum ( data<=(q3+whis*iq), 0 )
+    last = data.shape[0]-1
+    wisk_lo = np.where ( nlo<n, data[np.minimum(nlo,last),cols], q1 )
+    wisk_hi = np.where ( nhi>0, data[np.maximum(nhi-1,0),cols], q3 )
+
+    if bootstrap is not None:
+        ci = bootstrap_median_ci ( [data[:n_,i] for i,n_ in enumerate(n)],
+                N=bootstrap, rng=rng )
+        notch_min,notch_max = ci[:,0],ci[:,1]
+    else:
+        # Estimate notch locations using Gaussian-based asymptotic
+        # approximation
+        #
+        # For discussion: McGill, R., Tukey, J.W., and
+        # Larsen, W.A. (1978) "Variations of Boxplots", The
+        # American Statistitian, 32:12-16
+        notch_max = med + 1.57*iq/np.sqrt(n)
+        notch_min = med - 1.57*iq/np.sqrt(n)
+
+    for name,value in zip (
+            ('wisk_lo','q1','med','q3','wisk_hi','notch_min','notch_max'),
+            (wisk_lo,q1,med,q3,wisk_hi,notch_min,notch_max) ):
+        stats[name] = value
+
+    # Fliers are the sorted values below the low whisker and above the high
+    # whisker
+    stats['nflier_lo'] = nlo
+    stats['nflier_hi'] = n-nhi
+    nfliers = stats['nflier_lo']+stats['nflier_hi']
+    stats['flier_offset'] = np.cumsum ( nfliers )-nfliers
+    index = np.arange ( data.shape[0] )[:,None]
+    isflier = (index<nlo) | ((index>=nhi) & (index<n))
+    fliers = data.T[isflier.T]
+    return stats, fliers
+
+def _size_buckets ( x, slack=2 ):
+    """Indices of the samples in x grouped by size, or None if x can be
+    padded as a whole without taking more than slack times its size"""
+    if isinstance ( x, np.ndarray ) and x.dtype != object:
+        return None
+    sizes = np.array ( [np.size ( x_ ) for x_ in x] )
+    if len(sizes) < 2 or sizes.max()*len(sizes) <= slack*max ( sizes.sum(), 1 ):
+        return None
+    buckets = []
+    for i in np.argsort ( -sizes, kind='mergesort' ).tolist():
+        # The first sample of a bucket is its largest
+        if buckets and sizes[buckets[-1][0]]*(len(buckets[-1])+1) <= \
+                slack*(sizes[buckets[-1]].sum()+sizes[i]):
+            buckets[-1].append ( i )
+        else:
+            buckets.append ( [i] )
+    return buckets
+
+def _merge_buckets ( results, ngroups ):
+    """Combine the batch_boxplot_stats of buckets of groups"""
+    stats = np.zeros ( ngroups, boxstats_dtype )
+    fliers = [None]*ngroups
+    for index,(stats_,fliers_) in results:
+        stats[index] = stats_
+        for i,s in zip ( index, stats_ ):
+            o = s['flier_offset']
+            fliers[i] = fliers_[o:o+s['nflier_lo']+s['nflier_hi']]
+    nfliers = stats['nflier_lo']+stats['nflier_hi']
+    stats['flier_offset'] = np.cumsum ( nfliers )-nfliers
+    return stats,np.concatenate ( fliers )
+
+def unpack_boxplot_stats ( stats, fliers ):
+    """Convert the output of batch_boxplot_stats to a list of dicts
+
+    :Return:
+        a list with one dictionary per group with the keys 'main' (whisker,
+        quartiles and median), 'fliers' (low and high fliers) and 'notch'
+        (notch limits)
+    """
+    out = []
+    for s in stats:
+        o = s['flier_offset']
+        m = o+s['nflier_lo']
+        out.append ( {'main':(s['wisk_lo'],s['q1'],s['med'],s['q3'],s['wisk_hi']),
+            'fliers':(fliers[o:m],fliers[m:m+s['nflier_hi']]),
+            'notch':(s['notch_min'],s['notch_max'])} )
+    return out
+
+def pad_groups ( x, copy=False ):
+    """Arrange groups as columns of a 2-D float array padded with nan
+
+    Single precision input stays single precision, other input is
+    converted to double precision. Without copy, 2-D arrays that need no
+    conversion are returned as they are, otherwise the result is a new
+    array with contiguous columns that can be modified in place.
+    """
+    if isinstance ( x, np.ma.MaskedArray ):
+        out = np.array ( x.data, float_dtype ( x.dtype ), order='F' )
+        out[np.ma.getmaskarray ( x )] = np.nan
+        x = out
+    elif isinstance ( x, np.ndarray ) and x.dtype != object:
+        if copy:
+            x = np.array ( x, float_dtype ( x.dtype ), order='F' )
+        else:
+            x = np.asarray ( x, float_dtype ( x.dtype ) )
+    else:
+        # A reshaped column of a 2-D array is a view, a raveled one a copy
+        x = [np.asarray ( x_ ).reshape ( -1 ) for x_ in x]
+        dtype = float_dtype ( np.result_type ( *[x_.dtype for x_ in x] )
+                if len(x) else 'd' )
+        out = np.empty ( (max([len(x_) for x_ in x]+[0]),len(x)), dtype, order='F' )
+        out.fill ( np.nan )
+        for i,x_ in enumerate ( x ):
+            out[:len(x_),i] = x_
+        return out
+    if x.ndim == 1:
+        x = x[:,None]
+    elif x.ndim != 2:
+        raise ValueError ( "input x can have no more than 2 dimensions" )
+    return x
+
+def float_dtype ( dtype ):
+    """The floating point type that holds values of dtype and nan
+
+    float32 is kept, everything else becomes float64.
+    """
+    dtype = np.dtype ( dtype )
+    if dtype == np.float32:
+        return dtype
+    return np.dtype ( 'd' )
+
+def _sorted_percentile ( data, n, p ):
+    """Linearly interpolated percentile p of the sorted columns in data,
+    where column i has n[i] valid entries"""
+    pos = np.maximum ( n-1, 0 )*p/100.
+    lo = np.floor ( pos ).astype ( int )
+    hi = np.minimum ( lo+1, np.maximum ( n-1, 0 ) )
+    frac = pos-lo
+    cols = np.arange ( data.shape[1] )
+    return data[lo,cols]*(1-frac) + data[hi,cols]*frac
+
+#################################################################
+# Weighted and histogram input
+
+def weighted_boxplot_stats ( values, weights, whis=1.5, bootstrap=None,
+        rng=None, blocksize=2**22 ):
+    """Calculate the statistics for a single box from weighted values
+
+    For integer weights, the result is the same as for the values repeated
+    as often as their weight, but memory and time only depend on the number
+    of distinct values.
+
+    :Parameters:
+        *values*
+            values (nan values are ignored)
+        *weights*
+            non-negative weights of the values (for example counts)
+        *whis*
+            see batch_boxplot_stats
+        *bootstrap*
+            number of bootstrap resamples for the notches. Resamples are
+            multinomial draws of the counts, so the weights have to be
+            integers. If None, the notches are determined from a Gaussian
+            approximation.
+        *rng*
+            random number generator or seed for the bootstrap
+        *blocksize*
+            maximum number of resampled counts to hold in memory at once
+
+    :Return:
+        a dictionary with the keys 'main', 'fliers' and 'notch' (see
+        unpack_boxplot_stats) as well as 'n' (the total weight) and
+        'nfliers' (the total weight of the low and high fliers). Every
+        distinct flier value is only listed once.
+    """
+    values = np.asarray ( values, 'd' ).ravel()
+    weights = np.asarray ( weights, 'd' ).ravel()
+    if values.shape != weights.shape:
+        raise ValueError ( "values and weights have different sizes" )
+    if np.any ( weights<0 ):
+        raise ValueError ( "weights have to be non-negative" )
+    keep = ~np.isnan ( values ) & (weights>0)
+    order = np.argsort ( values[keep], kind='mergesort' )
+    v,w = values[keep][order],weights[keep][order]
+    cum = np.cumsum ( w )
+    n = cum[-1] if len(cum) else 0.
+    if n == 0:
+        nan = np.nan
+        return {'main':(nan,)*5, 'fliers':(v,v), 'notch':(nan,nan),
+                'n':n, 'nfliers':(0.,0.)}
+
+    q1,med,q3 = _weighted_percentile ( v, cum, [25,50,75] )
+    iq = q3-q1
+    lo,hi = q1-whis*iq,q3+whis*iq
+    inside = np.flatnonzero ( (v>=lo) & (v<=hi) )
+    wisk_lo = v[inside[0]] if len(inside) else q1
+    wisk_hi = v[inside[-1]] if len(inside) else q3
+
+    if bootstrap is not None:
+        if isinstance ( rng, (int,np.integer) ):
+            rng = sample_rng ( rng, v, w )
+        notch = tuple ( _weighted_bootstrap_median_ci ( v, w, bootstrap,
+            (2.5,97.5), get_rng ( rng ), blocksize ) )
+    else:
+        notch = (med - 1.57*iq/np.sqrt(n), med + 1.57*iq/np.sqrt(n))
+
+    flo,fhi = v<lo,v>hi
+    return {'main':(wisk_lo,q1,med,q3,wisk_hi),
+            'fliers':(np.unique ( v[flo] ),np.unique ( v[fhi] )),
+            'notch':notch,
+            'n':n,
+            'nfliers':(w[flo].sum(),w[fhi].sum())}
+
+def histogram_boxplot_stats ( counts, edges, **kwargs ):
+    """Calculate the statistics for a single box from a histogram
+
+    Every count is placed at the center of its bin, so that the statistics
+    are accurate to the bin width. The keyword arguments are passed on to
+    weighted_boxplot_stats.
+
+    :Parameters:
+        *counts*
+            counts of the bins
+        *edges*
+            bin edges (one more than counts)
+    """
+    edges = np.asarray ( edges, 'd' )
+    if len(edges) != len(counts)+1:
+        raise ValueError ( "expected %d bin edges, got %d" % (len(counts)+1,len(edges)) )
+    return weighted_boxplot_stats ( .5*(edges[:-1]+edges[1:]), counts,
+            **kwargs )
+
+def _weighted_percentile ( v, cum, p ):
+    """Percentiles p of the sorted values v with cumulative weights cum,
+    interpolated between ranks as for repeated values"""
+    rank = (cum[-1]-1)*np.asarray ( p, 'd' )/100.
+    last = len(v)-1
+    lo = v[np.minimum ( np.searchsorted ( cum, np.floor ( rank ), 'right' ), last )]
+    hi = v[np.minimum ( np.searchsorted ( cum, np.ceil ( rank ), 'right' ), last )]
+    return lo+(hi-lo)*(rank-np.floor ( rank ))
+
+def _weighted_bootstrap_median_ci ( v, w, N, percentile, rng, blocksize ):
+    if np.any ( w != np.round ( w ) ):
+        raise ValueError ( "bootstrapped notches need integer weights" )
+    n = int ( w.sum() )
+    p = w/w.sum()
+    r = (n-1)/2.
+    estimate = np.empty ( N, 'd' )
+    rows = max ( 1, blocksize//len(v) )
+    for start in range ( 0, N, rows ):
+        stop = min ( N, start+rows )
+        cum = np.cumsum ( rng.multinomial ( n, p, size=stop-start ), 1 )
+        lo = np.minimum ( np.sum ( cum<=np.floor ( r ), 1 ), len(v)-1 )
+        hi = np.minimum ( np.sum ( cum<=np.ceil ( r ), 1 ), len(v)-1 )
+        estimate[start:stop] = 0.5*(v[lo]+v[hi])
+    return np.percentile ( estimate, percentile )
+
+#################################################################
+# Percentiles of large samples
+
+def percentiles ( x, p, method='exact', tol=0.001 ):
+    """Linearly interpolated percentiles of x
+
+    :Parameters:
+        *x*
+            data (flattened)
+        *p*
+            sequence of percentiles in the range 0-100
+        *method*
+            'exact' uses numpy.percentile. 'partition' gives the same result
+            but only partially sorts a single copy of the data.
+            'histogram' bins the data in chunks and is accurate to
+            tol*(max(x)-min(x)), which is enough for tick positions.
+        *tol*
+            tolerance of the 'histogram' method relative to the data range
+    """
+    if method == 'histogram':
+        return _BinnedSample ( x, tol ).percentile ( p )
+    x = np.ravel ( x )
+    if method == 'partition':
+        pos = (len(x)-1)*np.asarray ( p, 'd' )/100.
+        lo = np.floor ( pos ).astype ( int )
+        hi = np.ceil ( pos ).astype ( int )
+        x = np.partition ( x, np.unique ( np.r_[lo,hi] ) )
+        return x[lo]+(x[hi]-x[lo])*(pos-lo)
+    elif method == 'exact':
+        return np.percentile ( x, p )
+    raise ValueError ( "unknown percentile method '%s'" % (method,) )
+
+def trimmed_percentiles ( x, whis=1.5, method='exact', tol=0.001 ):
+    """Percentiles 0,25,50,75,100 of x without outliers
+
+    Minimum and maximum are replaced by the most extreme values within whis
+    interquartile ranges from the median if the data extend further than
+    that. method and tol are as for percentiles.
+    """
+    if method == 'histogram':
+        binned = _BinnedSample ( x, tol )
+        p = binned.percentile ( [0,25,50,75,100] )
+        smallest,largest = binned.min_above,binned.max_below
+    else:
+        x = np.ravel ( x )
+        p = percentiles ( x, [0,25,50,75,100], method, tol )
+        smallest = lambda v: x[x>v].min()
+        largest = lambda v: x[x<v].max()
+    iq = p[3]-p[1]
+    if p[2]-p[0]>whis*iq:
+        p[0] = smallest ( p[2]-whis*iq )
+    if p[4]-p[2]>whis*iq:
+        p[4] = largest ( p[2]+whis*iq )
+    return p
+
+class _BinnedSample ( object ):
+    """Counts of x in ceil(1/tol) equally wide bins between min and max"""
+    def __init__ ( self, x, tol, chunksize=2**20 ):
+        x = np.asarray ( x ).ravel()
+        self.n = len(x)
+        self.lo,self.hi = float(x.min()),float(x.max())
+        self.nbins = max ( 1, int ( np.ceil ( 1./tol ) ) )
+        self.width = (self.hi-self.lo)/self.nbins or 1.
+        self.counts = np.zeros ( self.nbins, int )
+        for start in range ( 0, self.n, chunksize ):
+            index = self._bin ( x[start:start+chunksize] )
+            self.counts += np.bincount ( index, minlength=self.nbins )
+        self.cumulative = np.cumsum ( self.counts )
+
+    def _bin ( self, x ):
+        index = ((x-self.lo)/self.width).astype ( int )
+        return np.clip ( index, 0, self.nbins-1, out=index )
+
+    def percentile ( self, p ):
+        rank = (self.n-1)*np.asarray ( p, 'd' )/100.
+        lo = self._value ( np.floor ( rank ) )
+        hi = self._value ( np.ceil ( rank ) )
+        return lo+(hi-lo)*(rank-np.floor ( rank ))
+
+    def _value ( self, rank ):
+        """Value of rank, assuming that values are evenly spread in a bin"""
+        b = np.minimum ( np.searchsorted ( self.cumulative, rank, 'right' ),
+                self.nbins-1 )
+        below = self.cumulative[b]-self.counts[b]
+        frac = (rank-below+.5)/np.maximum ( self.counts[b], 1 )
+        return np.clip ( self.lo+(b+frac)*self.width, self.lo, self.hi )
+
+    def min_above ( self, v ):
+        b = int ( self._bin ( np.array ( [v] ) )[0] )
+        b += np.argmax ( self.counts[b:]>0 )
+        return max ( v, self.lo+b*self.width )
+
+    def max_below ( self, v ):
+        b = int ( self._bin ( np.array ( [v] ) )[0] )
+        b = np.flatnonzero ( self.counts[:b+1] )[-1]
+        return min ( v, self.lo+(b+1)*self.width, self.hi )
+
+#################################################################
+# Densities
+
+def binned_kde ( x, ngrid=512, bw='scott', cut=3, lim=None ):
+    """Gaussian kernel density estimates of all groups on a common grid
+
+    The data are linearly binned on the grid and the bins are convolved
+    with the kernels by FFT, which takes O(n + ngrid log ngrid) time per
+    group instead of O(n ngrid).
+
+    :Parameters:
+        *x*
+            a sample, a 2-D array with one group per column or a sequence of
+            samples (nan values are ignored)
+        *ngrid*
+            number of grid points
+        *bw*
+            bandwidth: 'scott', 'silverman' (rules of thumb as in
+            scipy.stats.gaussian_kde), a number or one number per group
+        *cut*
+            the grid extends cut bandwidths beyond the data
+        *lim*
+            range of the grid (Default: determined by cut)
+
+    :Return:
+        the grid (ngrid,), the densities (ngroups,ngrid) and the bandwidths
+        (ngroups,)
+    """
+    groups = _kde_groups ( x )
+    k = len(groups)
+    n = np.array ( [len(g) for g in groups], 'd' )
+    if isinstance ( bw, str ):
+        sd = np.array ( [g.std ( ddof=1 ) if len(g) > 1 else 0. for g in groups] )
+        if bw == 'scott':
+            bw = sd*np.maximum ( n, 1 )**-.2
+        elif bw == 'silverman':
+            bw = sd*np.maximum ( .75*n, 1 )**-.2
+        else:
+            raise ValueError ( "unknown bandwidth rule '%s'" % (bw,) )
+    bw = np.ones ( k )*np.asarray ( bw, 'd' )
+
+    if lim is None:
+        nonempty = [i for i in range ( k ) if n[i]]
+        if not nonempty:
+            raise ValueError ( "no data to estimate a density from" )
+        lim = (min ( [groups[i].min()-cut*bw[i] for i in nonempty] ),
+                max ( [groups[i].max()+cut*bw[i] for i in nonempty] ))
+    lo,hi = float(lim[0]),float(lim[1])
+    if hi <= lo:
+        lo,hi = lo-.5,hi+.5
+    grid = np.linspace ( lo, hi, ngrid )
+    delta = grid[1]-grid[0]
+    # Degenerate groups are shown with a bandwidth of one grid step
+    bw[bw<=0] = delta
+
+    counts = np.zeros ( (k,ngrid), 'd' )
+    for i,g in enumerate ( groups ):
+        t = (g-lo)/delta
+        t = t[(t>=0) & (t<=ngrid-1)]
+        j = np.minimum ( np.floor ( t ).astype ( int ), ngrid-2 )
+        f = t-j
+        counts[i] = np.bincount ( j, 1-f, ngrid ) + \
+                np.bincount ( j+1, f, ngrid )[:ngrid]
+
+    # With at least twice the grid size, the circular convolution does not
+    # wrap around
+    nfft = 2**int ( np.ceil ( np.log2 ( 2*ngrid ) ) )
+    dist = np.minimum ( np.arange ( nfft ), nfft-np.arange ( nfft ) )*delta
+    kernel = np.exp ( -.5*(dist/bw[:,None])**2 )
+    kernel /= kernel.sum ( 1 )[:,None]*delta
+    density = np.fft.irfft ( np.fft.rfft ( counts, nfft )*np.fft.rfft ( kernel ),
+            nfft )[:,:ngrid]
+    density /= np.maximum ( n, 1 )[:,None]
+    return grid,np.maximum ( density, 0 ),bw
+
+def _kde_groups ( x ):
+    """List of the nan-free groups in x"""
+    if isinstance ( x, np.ndarray ) and x.dtype != object:
+        if x.ndim == 1:
+            x = [x]
+        elif x.ndim == 2:
+            x = list ( x.T )
+        else:
+            raise ValueError ( "input x can have no more than 2 dimensions" )
+    elif len(x) and not hasattr ( x[0], '__len__' ):
+        x = [x]
+    groups = []
+    for g in x:
+        g = np.asarray ( g, 'd' ).ravel()
+        groups.append ( g[~np.isnan ( g )] )
+    return groups
+
+#################################################################
+# Out of core statistics
+
+class QuantileSketch ( object ):
+    """Streaming quantile sketch
+
+    A KLL sketch (Karnin, Z., Lang, K. and Liberty, E. (2016) "Optimal
+    Quantile Approximation in Streams", FOCS 2016) that keeps O(1/eps)
+    values, no matter how many values were added.
+
+    :Parameters:
+        *eps*
+            approximate bound on the error of the quantiles, as a fraction of
+            the number of values (rank error)
+        *rng*
+            random number generator or seed for the compactions
+    """
+    def __init__ ( self, eps=0.001, rng=None ):
+        self.k = max ( 8, int ( np.ceil ( 2./eps ) ) )
+        self.rng = get_rng ( rng )
+        self.levels = [np.empty ( 0, 'd' )]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update ( self, x ):
+        """Add the (non-nan) values in x to the sketch"""
+        x = np.asarray ( x, 'd' ).ravel()
+        x = x[~np.isnan ( x )]
+        if len(x) == 0:
+            return
+        self.n += len(x)
+        self.min = min ( self.min, x.min() )
+        self.max = max ( self.max, x.max() )
+        self.levels[0] = np.concatenate ( (self.levels[0],x) )
+        self._compress ()
+
+    def quantile ( self, q ):
+        """Approximate quantiles q (between 0 and 1) of the values added"""
+        values = np.concatenate ( self.levels )
+        weights = np.concatenate ( [np.repeat ( 2.**h, len(level) )
+            for h,level in enumerate ( self.levels )] )
+        order = np.argsort ( values )
+        values = values[order]
+        # Value i covers the ranks cumsum(weights)[i]-weights[i] ... cumsum(weights)[i]-1
+        rank = np.cumsum ( weights[order] )-.5*(weights[order]+1)
+        q = np.asarray ( q, 'd' )
+        return np.clip ( np.interp ( q*(self.n-1), rank, values ),
+                self.min, self.max )
+
+    def _capacity ( self, h ):
+        return max ( 2, int ( np.ceil (
+            self.k*(2./3)**(len(self.levels)-1-h) ) ) )
+
+    def _compress ( self ):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity ( h ):
+                h += 1
+                continue
+            if h+1 == len(self.levels):
+                self.levels.append ( np.empty ( 0, 'd' ) )
+            level = np.sort ( level )
+            # Every other value moves up with twice the weight, an odd one
+            # out stays
+            keep = len(level)%2
+            offset = int ( _integers ( self.rng, 2, 1 )[0] )
+            self.levels[h+1] = np.concatenate ( (self.levels[h+1],
+                level[keep+offset::2]) )
+            self.levels[h] = level[:keep]
+            h = 0
+
+def streaming_boxplot_stats ( x, whis=1.5, eps=0.001, maxfliers=1000,
+        rng=None, chunksize=2**20 ):
+    """Calculate the statistics for a single box in two streaming passes
+
+    Median and quartiles are taken from a QuantileSketch in the first pass.
+    Whiskers, the number of fliers and a random sample of at most maxfliers
+    fliers on either side are determined in a second pass. Memory use is
+    bounded by chunksize, 1/eps and maxfliers.
+
+    :Parameters:
+        *x*
+            an array (for example a numpy.memmap), which is read in chunks of
+            chunksize values, or a re-iterable of chunks (for example a list
+            of arrays or an object that opens a file in __iter__)
+        *whis*
+            see batch_boxplot_stats
+        *eps*
+            approximate rank error of the quartiles (see QuantileSketch)
+        *maxfliers*
+            maximum number of fliers per side that are kept
+        *rng*
+            random number generator or seed
+
+    :Return:
+        a dictionary with the keys 'main', 'fliers' and 'notch' (see
+        unpack_boxplot_stats) as well as 'n' and 'nfliers' (the total number
+        of low and high fliers)
+    """
+    if iter ( x ) is x:
+        raise ValueError ( "streaming boxplot statistics need two passes over the data, x can not be an iterator" )
+    rng = get_rng ( rng )
+
+    sketch = QuantileSketch ( eps, rng )
+    for chunk in _chunks ( x, chunksize ):
+        sketch.update ( chunk )
+    n = sketch.n
+    q1,med,q3 = sketch.quantile ( [.25,.5,.75] )
+    iq = q3-q1
+    lo_val,hi_val = q1-whis*iq,q3+whis*iq
+
+    wisk_lo,wisk_hi = np.inf,-np.inf
+    nfliers = [0,0]
+    fliers = [(np.empty(0),np.empty(0)),(np.empty(0),np.empty(0))]
+    for chunk in _chunks ( x, chunksize ):
+        inside = chunk[(chunk>=lo_val) & (chunk<=hi_val)]
+        if len(inside):
+            wisk_lo = min ( wisk_lo, inside.min() )
+            wisk_hi = max ( wisk_hi, inside.max() )
+        for side,f in enumerate ( (chunk[chunk<lo_val],chunk[chunk>hi_val]) ):
+            nfliers[side] += len(f)
+            # Reservoir sample: keep the fliers with the smallest random keys
+            keys = np.concatenate ( (fliers[side][0],_uniform ( rng, len(f) )) )
+            values = np.concatenate ( (fliers[side][1],f) )
+            if len(keys) > maxfliers:
+                index = np.argpartition ( keys, maxfliers-1 )[:maxfliers]
+                keys,values = keys[index],values[index]
+            fliers[side] = (keys,values)
+    if wisk_lo > wisk_hi:
+        wisk_lo,wisk_hi = q1,q3
+
+    # Gaussian-based asymptotic approximation of the notches (see
+    # batch_boxplot_stats)
+    notch = (med - 1.57*iq/np.sqrt(n), med + 1.57*iq/np.sqrt(n))
+    return {'main':(wisk_lo,q1,med,q3,wisk_hi),
+            'fliers':(np.sort ( fliers[0][1] ),np.sort ( fliers[1][1] )),
+            'notch':notch,
+            'n':n,
+            'nfliers':tuple ( nfliers )}
+
+def _chunks ( x, chunksize ):
+    """Iterate over x in flat, nan-free chunks"""
+    if hasattr ( x, 'shape' ):
+        chunks = (x[start:start+chunksize]
+                for start in range ( 0, x.shape[0], max ( 1, chunksize ) ))
+    else:
+        chunks = x
+    for chunk in chunks:
+        chunk = np.asarray ( chunk, 'd' ).ravel()
+        yield chunk[~np.isnan ( chunk )]
+
+def is_chunked ( x ):
+    """Should x be summarized by streaming_boxplot_stats?
+
+    This is the case for memory mapped arrays, for sequences of arrays and
+    for iterables that are neither sequences nor arrays.
+    """
+    if isinstance ( x, np.memmap ):
+        return True
+    if isinstance ( x, np.ndarray ):
+        return False
+    if isinstance ( x, (list,tuple) ):
+        return len(x) > 0 and isinstance ( x[0], np.ndarray ) and x[0].ndim > 0
+    return hasattr ( x, '__iter__' ) and not hasattr ( x, '__len__' )
+
+#################################################################
+# Error band reducers for Errorline
+
+def axis_reducer ( f ):
+    """Mark f as an error band reducer that works on whole arrays
+
+    An axis reducer is called as f(a,axis) and returns a tuple of lower and
+    upper limits along that axis. Reducers that have a cache_key attribute
+    (a tuple of their name and parameters) can be cached by dvis.cache.
+    """
+    f.axis_aware = True
+    return f
+
+@axis_reducer
+def sem_band ( a, axis=-1 ):
+    """mean +/- standard error of the mean"""
+    a = np.asarray ( a )
+    m = a.mean ( axis )
+    s = a.std ( axis )/np.sqrt ( a.shape[axis] )
+    return m-s,m+s
+sem_band.cache_key = ('sem_band',)
+
+def percentile_band ( lo=2.5, hi=97.5 ):
+    """Reducer that returns the percentiles lo and hi of the samples"""
+    @axis_reducer
+    def band ( a, axis=-1 ):
+        p = np.percentile ( a, [lo,hi], axis=axis )
+        return p[0],p[1]
+    band.cache_key = ('percentile_band',lo,hi)
+    return band
+
+def bootstrap_band ( N=1000, percentile=(2.5,97.5), rng=None,
+        blocksize=2**22 ):
+    """Reducer that returns bootstrap confidence intervals of the mean
+
+    All samples are resampled with the same bootstrap indices. The
+    resamples are drawn in blocks of at most blocksize counts and the
+    means of a block are obtained from a single matrix product.
+    """
+    seed = rng if isinstance ( rng, (int,np.integer) ) else None
+    if seed is None:
+        rng = get_rng ( rng )
+    @axis_reducer
+    def band ( a, axis=-1 ):
+        # A seeded band starts from the seed on every call, so that its
+        # results are the same with and without a cache
+        rng_ = get_rng ( rng )
+        a = np.swapaxes ( np.asarray ( a, 'd' ), axis, -1 )
+        shape,M = a.shape[:-1],a.shape[-1]
+        a = a.reshape ( (-1,M) )
+        estimate = np.empty ( (a.shape[0],N), 'd' )
+        rows = max ( 1, blocksize//max ( M, a.shape[0] ) )
+        for start in range ( 0, N, rows ):
+            stop = min ( N, start+rows )
+            k = stop-start
+            index = _integers ( rng_, M, (k,M) ) + M*np.arange ( k )[:,None]
+            counts = np.bincount ( index.ravel(), minlength=k*M ).reshape ( (k,M) )
+            estimate[:,start:stop] = np.dot ( a, counts.T )/float(M)
+        ci = np.percentile ( estimate, percentile, axis=1 )
+        return ci[0].reshape ( shape ),ci[1].reshape ( shape )
+    band.cache_key = ('bootstrap_band',N,tuple(percentile),seed)
+    return band
+
+def get_reducer ( se ):
+    """Look up a builtin error band reducer
+
+    :Parameters:
+        *se*
+            None (standard error of the mean), 'sem', 'percentile',
+            'bootstrap' or a callable that is returned as is
+    """
+    if se is None or se == 'sem':
+        return sem_band
+    elif se == 'percentile':
+        return percentile_band ()
+    elif se == 'bootstrap':
+        return bootstrap_band ()
+    elif callable ( se ):
+        return se
+    raise ValueError ( "unknown error band reducer %r" % (se,) )
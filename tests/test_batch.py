@@ -0,0 +1,36 @@
+"""Batch rendering of figure specs"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis.batch
+
+def spec ( i ):
+    return {'name':'fig%d' % i, 'size':(2,2), 'dpi':30, 'grid':(1,2),
+            'plots':[{'axes':(0,0), 'kind':'Boxplot',
+                      'args':(np.arange ( 40.*(i+1) ).reshape ( (-1,4) ),)},
+                     {'axes':(0,1), 'kind':'plot', 'args':([0,i],[i,0])}]}
+
+def test_render_in_process ():
+    specs = [spec ( i ) for i in range ( 3 )]
+    specs.insert ( 1, {'name':'broken', 'plots':[{'kind':'NoSuchPlot'}]} )
+    results = list ( dvis.batch.render_batch ( specs, processes=1 ) )
+    assert [r['index'] for r in results] == [0,1,2,3]
+    assert [r['ok'] for r in results] == [True,False,True,True]
+    assert 'NoSuchPlot' in results[1]['error']
+    assert results[0]['name'] == 'fig0'
+    assert results[0]['output'].startswith ( b'\x89PNG' )
+    assert results[0]['output'] == dvis.batch.render_spec ( specs[0] )
+
+def test_render_in_pool ( tmpdir ):
+    specs = [dict ( spec ( i ), filename=str ( tmpdir.join ( '%d.png' % i ) ) )
+            for i in range ( 6 )]
+    results = list ( dvis.batch.render_batch ( specs, processes=2, chunksize=2 ) )
+    assert sorted ( [r['index'] for r in results] ) == list ( range ( 6 ) )
+    assert all ( [r['ok'] for r in results] )
+    for r in results:
+        assert r['output'] == specs[r['index']]['filename']
+        assert tmpdir.join ( '%d.png' % r['index'] ).read_binary () == \
+                dvis.batch.render_spec ( spec ( r['index'] ) )
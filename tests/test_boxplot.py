@@ -0,0 +1,95 @@
+"""Boxplot input handling and artists"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+import dvis.stats
+
+class Chunks ( object ):
+    """A re-iterable source of chunks that has no length, like a file reader"""
+    def __init__ ( self, x, chunksize=1000 ):
+        self.x = x
+        self.chunksize = chunksize
+        self.passes = 0
+
+    def __iter__ ( self ):
+        self.passes += 1
+        for start in range ( 0, len(self.x), self.chunksize ):
+            yield self.x[start:start+self.chunksize]
+
+def values ( n=20000, seed=0 ):
+    return np.random.RandomState ( seed ).standard_normal ( n )
+
+def assert_quartiles_close ( box, x, eps ):
+    q = np.percentile ( x, [25,50,75] )
+    ranks = np.searchsorted ( np.sort ( x ), box.boxstats['main'][1:4] )
+    assert np.all ( np.abs ( ranks-np.array ( [.25,.5,.75] )*len(x) ) <= 2*eps*len(x) )
+    assert np.allclose ( box.boxstats['main'][1:4], q, atol=.05 )
+
+def new_axes ():
+    return dvis.agg_figure ().add_subplot ( 111 )
+
+def test_memmap_group ( tmpdir ):
+    x = values ()
+    m = np.lib.format.open_memmap ( str ( tmpdir.join ( 'x.npy' ) ), 'w+', 'd', x.shape )
+    m[:] = x
+    m.flush ()
+    m = np.load ( str ( tmpdir.join ( 'x.npy' ) ), mmap_mode='r' )
+    boxes = dvis.Boxplot ( [m,x[:100]], ax=new_axes (), eps=0.001 )
+    assert len(boxes) == 2
+    assert_quartiles_close ( boxes[0], x, 0.001 )
+
+def test_reiterable_chunks ():
+    x = values ()
+    chunks = Chunks ( x )
+    boxes = dvis.Boxplot ( chunks, ax=new_axes (), eps=0.001 )
+    assert len(boxes) == 1
+    assert chunks.passes == 2
+    assert_quartiles_close ( boxes[0], x, 0.001 )
+
+def test_reiterable_chunks_with_other_groups ():
+    x = values ()
+    boxes = dvis.Boxplot ( [Chunks ( x ),x[:500]], ax=new_axes (), eps=0.001 )
+    assert len(boxes) == 2
+    assert_quartiles_close ( boxes[0], x, 0.001 )
+    assert np.allclose ( boxes[1].boxstats['main'][1:4],
+            np.percentile ( x[:500], [25,50,75] ) )
+
+def test_redraw_adds_no_artists ():
+    ax = new_axes ()
+    boxes = dvis.Boxplot ( values ( 400 ).reshape ( (100,4) ), ax=ax )
+    ax.figure.canvas.draw ()
+    children = ax.get_children ()
+    sub = [box.get_children () for box in boxes]
+    ax.set_ylim ( -10, 10 )
+    ax.figure.canvas.draw ()
+    ax.figure.canvas.draw ()
+    assert ax.get_children () == children
+    assert [box.get_children () for box in boxes] == sub
+    assert len(ax.lines) == 0
+    segments = sub[0][1].get_segments ()
+    assert np.allclose ( segments[0][:,1], boxes[0].boxstats['main'][:2] )
+
+def test_animated_set_data_moves_the_boxes ():
+    ax = new_axes ()
+    x = values ( 400 ).reshape ( (100,4) )
+    boxes = dvis.Boxplot ( x, ax=ax, animated=True )
+    ax.figure.canvas.draw ()
+    limits = ax.get_xlim (),ax.get_ylim ()
+    for box in boxes:
+        ax.draw_artist ( box )
+    sub = [box.get_children () for box in boxes]
+    assert all ( [a.get_animated () for s in sub for a in s] )
+    assert boxes.set_data ( x+1 ) is boxes
+    for box in boxes:
+        ax.draw_artist ( box )
+    assert [box.get_children () for box in boxes] == sub
+    assert (ax.get_xlim (),ax.get_ylim ()) == limits
+    assert np.allclose ( [box.boxstats['main'][2] for box in boxes],
+            np.median ( x+1, 0 ) )
+    assert np.allclose ( sub[0][0].get_ydata (), np.r_[boxes[0].boxstats['fliers']] )
+    with pytest.raises ( ValueError ):
+        boxes.set_data ( x[:,:3] )
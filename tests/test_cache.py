@@ -0,0 +1,103 @@
+"""Persistent statistics cache"""
+
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+import dvis.cache
+import dvis.stats
+
+def groups ( seed=0 ):
+    rng = np.random.RandomState ( seed )
+    return [rng.standard_normal ( 40+10*i ) for i in range ( 4 )]
+
+def notches ( x, **kwargs ):
+    pytest.importorskip ( 'matplotlib' )
+    from dvis.customized import _boxplot_stats
+    kwargs.setdefault ( 'bootstrap', 500 )
+    kwargs.setdefault ( 'rng', 3 )
+    return np.array ( [b['notch'] for b in _boxplot_stats ( x, None, kwargs )] )
+
+def test_bootstrap_notches_same_with_and_without_cache ( tmpdir ):
+    x = groups ()
+    uncached = notches ( x )
+    notches ( x[1:3], cache=str ( tmpdir ) )
+    cold = notches ( x, cache=str ( tmpdir ) )
+    warm = notches ( x, cache=str ( tmpdir ) )
+    assert np.array_equal ( uncached, cold )
+    assert np.array_equal ( uncached, warm )
+    assert np.array_equal ( notches ( x[::-1] )[::-1], uncached )
+
+def test_weighted_notches_same_with_and_without_cache ( tmpdir ):
+    x = groups ()
+    w = [np.ones ( len(x_) ) for x_ in x]
+    uncached = notches ( x, weights=w )
+    notches ( x[:2], weights=w[:2], cache=str ( tmpdir ) )
+    cached = notches ( x, weights=w, cache=str ( tmpdir ) )
+    assert np.array_equal ( uncached, cached )
+
+def test_seeded_groups_are_resampled_independently ():
+    x = groups ()[0]
+    ci = dvis.stats.bootstrap_median_ci ( [x,2*x], N=500, rng=3 )
+    assert not np.allclose ( ci[1]/ci[0], 2 )
+    again = dvis.stats.bootstrap_median_ci ( [2*x], N=500, rng=3 )
+    assert np.array_equal ( again[0], ci[1] )
+
+def test_seeded_bootstrap_band_is_reproducible ( tmpdir ):
+    a = np.random.RandomState ( 1 ).standard_normal ( (20,30) )
+    band = dvis.stats.bootstrap_band ( 200, rng=5 )
+    first = band ( a, axis=1 )
+    assert np.array_equal ( first, band ( a, axis=1 ) )
+    assert np.array_equal ( first, dvis.stats.bootstrap_band ( 200, rng=5 ) ( a, axis=1 ) )
+
+def test_eviction_keeps_the_cache_below_maxbytes ( tmpdir ):
+    cache = dvis.cache.StatsCache ( str ( tmpdir ), maxbytes=20000 )
+    for i in range ( 100 ):
+        cache.set ( str ( i ), np.zeros ( 100 ) )
+    sizes = [size for mtime,size,path in cache.entries ()]
+    assert sum ( sizes ) <= 20000
+    assert 0 < len(sizes) < 100
+    # The latest entry survives, the first ones are gone
+    assert cache.get ( '99' ) is not None
+    assert cache.get ( '0' ) is None
+    cache.clear ()
+    assert cache.entries () == []
+
+def test_cached_computes_once ( tmpdir ):
+    cache = dvis.cache.StatsCache ( str ( tmpdir ) )
+    calls = []
+    def compute ():
+        calls.append ( 1 )
+        return np.arange ( 3 )
+    key = dvis.cache.array_key ( 'test', np.arange ( 5 ) )
+    assert np.array_equal ( cache.cached ( key, compute ), np.arange ( 3 ) )
+    assert np.array_equal ( cache.cached ( key, compute ), np.arange ( 3 ) )
+    assert len(calls) == 1
+    assert (cache.hits,cache.misses) == (1,1)
+
+def _write ( args ):
+    directory,worker = args
+    cache = dvis.cache.StatsCache ( directory, maxbytes=50000 )
+    for i in range ( 200 ):
+        key = str ( i%20 )
+        cache.set ( key, np.full ( 200, i%20, 'd' ) )
+        value = cache.get ( key )
+        if value is not None and not np.all ( value == i%20 ):
+            return False
+    return True
+
+def test_concurrent_writers ( tmpdir ):
+    pool = multiprocessing.Pool ( 4 )
+    try:
+        ok = pool.map ( _write, [(str ( tmpdir ),i) for i in range ( 4 )] )
+    finally:
+        pool.close ()
+        pool.join ()
+    assert all ( ok )
+    cache = dvis.cache.StatsCache ( str ( tmpdir ) )
+    for mtime,size,path in cache.entries ():
+        key = os.path.basename ( path )[:-len('.pkl')]
+        assert np.all ( cache.get ( key ) == int ( key ) )
+    assert not [name for name in os.listdir ( str ( tmpdir ) ) if name.endswith ( '.tmp' )]
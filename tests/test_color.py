@@ -0,0 +1,46 @@
+"""Cached color resolution"""
+
+import pytest
+
+matplotlib = pytest.importorskip ( 'matplotlib' )
+
+import dvis.color
+
+@pytest.fixture
+def cache ():
+    dvis.color.color_cache_clear ()
+    yield dvis.color
+    dvis.color.color_cache_clear ()
+
+def test_gray_strings_do_not_collide_with_rgb ( cache ):
+    assert cache.to_rgb ( (0.5,0.2,0.1) ) == (0.5,0.2,0.1)
+    assert cache.to_rgb ( ('0.5','0.2','0.1') ) is None
+    assert cache.to_rgb ( [0.5,0.2,0.1] ) == (0.5,0.2,0.1)
+
+def test_cycle_colors_follow_the_property_cycle ( cache ):
+    with matplotlib.rc_context ( {'axes.prop_cycle':matplotlib.cycler ( color=['r'] )} ):
+        assert cache.to_rgb ( 'C0' ) == (1.,0.,0.)
+    with matplotlib.rc_context ( {'axes.prop_cycle':matplotlib.cycler ( color=['b'] )} ):
+        assert cache.to_rgb ( 'C0' ) == (0.,0.,1.)
+    assert cache.color_cache_info ()['size'] == 0
+
+def test_hits_and_misses ( cache ):
+    cache.to_rgb ( 'red' )
+    cache.to_rgb ( 'red' )
+    cache.to_rgb ( (0.,1.,0.) )
+    info = cache.color_cache_info ()
+    assert (info['hits'],info['misses'],info['size']) == (1,2,2)
+    cache.color_cache_clear ()
+    info = cache.color_cache_info ()
+    assert (info['hits'],info['misses'],info['size']) == (0,0,0)
+
+def test_least_recently_used_is_evicted ( cache, monkeypatch ):
+    monkeypatch.setattr ( cache, 'color_cache_maxsize', 3 )
+    for c in ['red','green','blue']:
+        cache.to_rgb ( c )
+    cache.to_rgb ( 'red' )
+    cache.to_rgb ( 'black' )
+    assert cache.color_cache_info ()['size'] == 3
+    assert list ( cache._color_cache ) == ['blue','red','black']
+    cache.to_rgb ( 'green' )
+    assert cache.color_cache_info ()['misses'] == 5
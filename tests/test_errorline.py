@@ -0,0 +1,69 @@
+"""Errorline and its variants"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+
+def new_axes ():
+    return dvis.agg_figure ().add_subplot ( 111 )
+
+def test_streaming_errorline_blits_after_one_draw ( monkeypatch ):
+    ax = new_axes ()
+    s = dvis.StreamingErrorline ( np.arange ( 10. ), np.zeros ( 10 ), .1,
+            ax=ax, capacity=4, autoscale=False )
+    ax.set_xlim ( 0, 100 )
+    ax.set_ylim ( -1, 1 )
+    canvas = ax.figure.canvas
+    draws,blits = [],[]
+    canvas.mpl_connect ( 'draw_event', lambda event: draws.append ( 1 ) )
+    monkeypatch.setattr ( canvas, 'blit', lambda bbox=None: blits.append ( 1 ) )
+    for i in range ( 10, 30 ):
+        s.append ( [float(i)], [i%2], .1, blit=True )
+    assert (len(draws),len(blits)) == (1,19)
+    assert np.array_equal ( s.line.get_xdata (), np.arange ( 30. ) )
+    band = s.patch.get_path ().vertices
+    assert len(band) == 2*30+1
+    assert np.allclose ( band[:30,1], s.line.get_ydata ()[::-1]+.1 )
+    assert np.allclose ( band[30:60,1], s.line.get_ydata ()-.1 )
+    assert np.array_equal ( band[0], band[-1] )
+
+def test_streaming_errorline_redraws_when_the_limits_change ( monkeypatch ):
+    ax = new_axes ()
+    s = dvis.StreamingErrorline ( [0.,1.], [0.,1.], .1, ax=ax )
+    canvas = ax.figure.canvas
+    draws = []
+    canvas.mpl_connect ( 'draw_event', lambda event: draws.append ( 1 ) )
+    monkeypatch.setattr ( canvas, 'blit', lambda bbox=None: None )
+    s.append ( [2.], [5.], blit=True )
+    s.append ( [3.], [20.], blit=True )
+    assert len(draws) == 2
+    assert ax.get_ylim ()[1] >= 20
+
+def test_errorlines_match_single_errorlines ():
+    rng = np.random.RandomState ( 3 )
+    x = np.arange ( 50. )
+    Y = np.cumsum ( rng.standard_normal ( (5,50) ), 1 )
+    E = rng.uniform ( .1, 1, (5,50) )
+    ax = new_axes ()
+    lines,bands = dvis.Errorlines ( x, Y, E, ax=ax )
+    assert ax.get_children ().count ( lines ) == 1
+    assert len(ax.collections) == 2 and len(ax.lines) == 0
+    assert len(lines.get_segments ()) == 5
+    for y,e,segment,path in zip ( Y, E, lines.get_segments (), bands.get_paths () ):
+        l,f = dvis.Errorline ( x, y, e, ax=new_axes () )
+        assert np.allclose ( segment, l[0].get_xydata () )
+        band = f[0].get_xy ()
+        assert np.allclose ( path.vertices[:100], band[:100] )
+
+def test_errorlines_from_samples ():
+    rng = np.random.RandomState ( 4 )
+    Y = rng.standard_normal ( (3,20,30) )
+    lines,bands = dvis.Errorlines ( np.arange ( 20. ), Y, ax=new_axes () )
+    for segment,path,y in zip ( lines.get_segments (), bands.get_paths (), Y ):
+        assert np.allclose ( segment[:,1], y.mean ( 1 ) )
+        sem = y.std ( 1 )/np.sqrt ( 30 )
+        assert np.allclose ( path.vertices[:20,1], y.mean ( 1 )-sem )
+        assert np.allclose ( path.vertices[20:40,1], (y.mean ( 1 )+sem)[::-1] )
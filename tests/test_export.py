@@ -0,0 +1,42 @@
+"""Vector exports with rasterized dense layers"""
+
+import io
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+import dvis.export
+
+def figure ( n ):
+    rng = np.random.RandomState ( 0 )
+    fig = dvis.agg_figure ( figsize=(3,2) )
+    ax = fig.add_subplot ( 111 )
+    x,y = rng.standard_normal ( (2,n) )
+    S = dvis.Scatter ( x, y, ax=ax )
+    l,f = dvis.Errorline ( np.arange ( 50. ), np.zeros ( 50 ), 1., ax=ax )
+    return fig,S,l[0]
+
+def svg ( fig, max_vertices ):
+    buf = io.BytesIO ()
+    report = dvis.export.savefig ( fig, buf, max_vertices, dpi=50, format='svg' )
+    return buf.getvalue (),report
+
+def test_dense_layers_are_rasterized ():
+    fig,S,line = figure ( 5000 )
+    image,report = svg ( fig, 10000 )
+    assert b'<image' in image
+    rasterized = [r for r in report if r['rasterized']]
+    assert [r['artist'] for r in rasterized] == ['PathCollection']
+    assert rasterized[0]['vertices'] > 10000
+    assert not S.get_rasterized ()
+    assert not line.get_rasterized ()
+    assert len(image) < len(svg ( fig, 10**7 )[0])
+
+def test_sparse_figures_stay_vectors ():
+    fig,S,line = figure ( 100 )
+    image,report = svg ( fig, 10000 )
+    assert b'<image' not in image
+    assert not any ( [r['rasterized'] for r in report] )
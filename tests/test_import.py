@@ -0,0 +1,12 @@
+"""Lazy imports of the dvis package"""
+
+import dvis
+
+def test_dir_lists_every_name_once ():
+    # Names that were loaded are in the globals of the package as well
+    for name in dvis.__all__:
+        getattr ( dvis, name )
+    names = dir ( dvis )
+    assert names == sorted ( set ( names ) )
+    for name in dvis.__all__:
+        assert name in names
@@ -0,0 +1,59 @@
+"""Level of detail reduction"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+import dvis.lod
+
+def walk ( n, seed=0 ):
+    rng = np.random.RandomState ( seed )
+    return np.arange ( n, dtype='d' ),np.cumsum ( rng.standard_normal ( n ) )
+
+def new_axes ():
+    return dvis.agg_figure ( figsize=(4,3), dpi=50 ).add_subplot ( 111 )
+
+def test_minmax_keeps_the_extremes_of_every_bucket ():
+    x,y = walk ( 100000 )
+    xr,yr = dvis.lod.minmax_decimate ( x, y, 100 )
+    assert len(xr) <= 4*100
+    assert np.all ( np.diff ( xr ) >= 0 )
+    assert yr.min() == y.min() and yr.max() == y.max()
+    assert (xr[0],xr[-1]) == (x[0],x[-1])
+
+def test_lttb_keeps_nout_points ():
+    x,y = walk ( 10000 )
+    xr,yr = dvis.lod.lttb ( x, y, 200 )
+    assert len(xr) == 200
+    assert (xr[0],xr[-1]) == (x[0],x[-1])
+    assert np.all ( np.isin ( xr, x ) )
+
+def test_errorline_follows_the_view ():
+    x,y = walk ( 200000 )
+    ax = new_axes ()
+    l,f = dvis.Errorline ( x, y, 1., ax=ax, lod=True )
+    line = l[0]
+    assert len(line.get_xdata ()) <= 4*ax.bbox.width
+    assert np.max ( line.get_ydata () ) == y.max()
+    ax.set_xlim ( 1000, 1100 )
+    xr = line.get_xdata ()
+    assert xr[0] <= 1000 and xr[-1] >= 1100
+    assert np.array_equal ( xr[1:-1], x[1000:1101] )
+    assert len(f[0].get_xy ()) < 2*len(x)
+
+def test_scatter_shows_one_point_per_cell ():
+    rng = np.random.RandomState ( 1 )
+    x,y = rng.standard_normal ( (2,100000) )
+    ax = new_axes ()
+    S = dvis.Scatter ( x, y, ax=ax, lod=True )
+    shown = len(S.get_offsets ())
+    assert 0 < shown < len(x)/10
+    assert S.get_visible () and not S.lod.image.get_visible ()
+    # The range frame is computed from all points
+    assert np.allclose ( S.range_frame.get_prctiles ()[0],
+            np.percentile ( x, [0,25,50,75,100] ) )
+    S.lod.maxpoints = 10
+    S.lod.update ()
+    assert S.lod.image.get_visible () and not S.get_visible ()
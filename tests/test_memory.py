@@ -0,0 +1,15 @@
+"""Peak memory of the Errorline and Boxplot data paths"""
+
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+pytest.importorskip ( 'tracemalloc' )
+
+from benchmarks import bench_memory
+
+@pytest.mark.parametrize ( 'dtype', ['float32','float64'] )
+@pytest.mark.parametrize ( 'case', sorted ( bench_memory.CASES ) )
+def test_peak_memory_within_limit ( case, dtype ):
+    result = bench_memory.measure ( case, 400000, dtype )
+    assert 'error' not in result, result.get ( 'error' )
+    assert result['ok'], result
@@ -0,0 +1,36 @@
+"""Axes layouts"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+
+def positions ( axes, fig ):
+    fig.canvas.draw ()
+    return [tuple ( np.round ( ax.get_position ().bounds, 6 ) ) for ax in np.ravel ( axes )]
+
+def test_template_places_axes_like_axes_grid ():
+    kwargs = {'hdist':.3, 'vdist':.1}
+    fig = dvis.agg_figure ()
+    expected = positions ( dvis.axes_grid ( (3,2), fig=fig, **kwargs ), fig )
+    template = dvis.AxesGridTemplate ( (3,2), **kwargs )
+    for repeat in range ( 2 ):
+        fig = dvis.agg_figure ()
+        axes = template.stamp ( fig )
+        assert axes.shape == (3,2)
+        assert positions ( axes, fig ) == expected
+
+def test_reset_reuses_the_axes ():
+    template = dvis.AxesGridTemplate ( (2,1), haveon=('b','l') )
+    fig = dvis.agg_figure ()
+    axes = template.stamp ( fig )
+    axes[0,0].plot ( [0,1], [1,0] )
+    dvis.Boxplot ( np.arange ( 40. ).reshape ( (10,4) ), ax=axes[1,0] )
+    reset = template.reset ( axes )
+    assert reset is axes
+    assert fig.axes == list ( np.ravel ( axes ) )
+    assert [len(ax.lines)+len(ax.artists) for ax in fig.axes] == [0,0]
+    assert axes[0,0].spines['top'].get_edgecolor ()[3] == 0
+    assert axes[0,0].spines['left'].get_position () == ('outward',10)
@@ -0,0 +1,45 @@
+"""Draw-time profiling of the dvis artists"""
+
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+
+def boxplot_figure ():
+    fig = dvis.agg_figure ( label='boxes' )
+    dvis.Boxplot ( np.arange ( 40. ).reshape ( (10,4) ), ax=fig.add_subplot ( 111 ) )
+    return fig
+
+def test_profile_records_phases ():
+    fig = boxplot_figure ()
+    seen = []
+    with dvis.profile ( callback=seen.append ) as prof:
+        fig.canvas.draw ()
+        fig.canvas.draw ()
+    assert seen == prof.records
+    summary = prof.summary ()
+    assert summary[('boxes','BoxplotArtist','draw')]['calls'] == 8
+    build = summary[('boxes','BoxplotArtist','build')]
+    assert (build['calls'],build['children']) == (4,8)
+    assert all ( [r['seconds'] >= 0 for r in prof.records] )
+    slowest = prof.slowest ( 3 )
+    assert len(slowest) == 3 and all ( [r['phase'] == 'draw' for r in slowest] )
+    assert slowest[0]['seconds'] >= slowest[-1]['seconds']
+
+def test_nothing_is_recorded_outside_a_profile ():
+    fig = boxplot_figure ()
+    with dvis.profile () as prof:
+        pass
+    fig.canvas.draw ()
+    assert prof.records == []
+
+def test_profiles_are_per_thread ():
+    with dvis.profile () as prof:
+        thread = threading.Thread ( target=lambda: boxplot_figure ().canvas.draw () )
+        thread.start ()
+        thread.join ()
+    assert prof.records == []
@@ -0,0 +1,65 @@
+"""Scatter and its range frame"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+import dvis.stats
+
+def new_axes ():
+    return dvis.agg_figure ().add_subplot ( 111 )
+
+@pytest.fixture
+def calls ( monkeypatch ):
+    calls = []
+    percentiles = dvis.stats.percentiles
+    def counted ( *args, **kwargs ):
+        calls.append ( 1 )
+        return percentiles ( *args, **kwargs )
+    monkeypatch.setattr ( dvis.stats, 'percentiles', counted )
+    return calls
+
+def test_range_frame_percentiles_are_cached ( calls ):
+    rng = np.random.RandomState ( 0 )
+    x,y = rng.standard_normal ( (2,1000) )
+    ax = new_axes ()
+    S = dvis.Scatter ( x, y, ax=ax )
+    ax.figure.canvas.draw ()
+    assert len(calls) == 2
+    children = ax.get_children ()
+    ax.set_xlim ( -5, 5 )
+    ax.figure.canvas.draw ()
+    ax.figure.canvas.draw ()
+    assert len(calls) == 2
+    assert ax.get_children () == children
+    assert np.allclose ( ax.get_xticks (), np.percentile ( x, [0,25,50,75,100] ) )
+
+def test_range_frame_follows_new_offsets ( calls ):
+    rng = np.random.RandomState ( 1 )
+    x,y = rng.standard_normal ( (2,1000) )
+    ax = new_axes ()
+    S = dvis.Scatter ( x, y, ax=ax )
+    ax.figure.canvas.draw ()
+    S.set_offsets ( np.c_[2*x,y] )
+    ax.figure.canvas.draw ()
+    assert len(calls) == 4
+    assert np.allclose ( S.range_frame.get_prctiles ()[0],
+            np.percentile ( 2*x, [0,25,50,75,100] ) )
+    S.range_frame.set_data ( x, 3*y )
+    assert np.allclose ( S.range_frame.get_prctiles ()[1],
+            np.percentile ( 3*y, [0,25,50,75,100] ) )
+
+def test_animated_scatter_keeps_its_ticks ():
+    rng = np.random.RandomState ( 2 )
+    x,y = rng.standard_normal ( (2,100) )
+    ax = new_axes ()
+    S = dvis.Scatter ( x, y, ax=ax, animated=True )
+    assert S.get_animated () and S.range_frame.get_animated ()
+    ticks = list ( ax.get_xticks () )
+    S.set_offsets ( np.c_[x+1,y] )
+    ax.draw_artist ( S.range_frame )
+    assert np.allclose ( S.range_frame.get_prctiles ()[0],
+            np.percentile ( x+1, [0,25,50,75,100] ) )
+    assert list ( ax.get_xticks () ) == ticks
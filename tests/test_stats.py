@@ -0,0 +1,124 @@
+"""Statistics of dvis.stats against reference implementations"""
+
+import numpy as np
+import pytest
+
+import dvis.stats
+
+def groups ( seed=0 ):
+    rng = np.random.RandomState ( seed )
+    return [rng.standard_normal ( n )*(1+i) for i,n in enumerate ( (7,50,333,1000) )]
+
+def assert_stats_equal_percentiles ( stats, fliers, x, whis=1.5 ):
+    for s,b,x_ in zip ( stats, dvis.stats.unpack_boxplot_stats ( stats, fliers ), x ):
+        x_ = x_[~np.isnan ( x_ )]
+        q1,med,q3 = np.percentile ( x_, [25,50,75] )
+        assert np.allclose ( [s['q1'],s['med'],s['q3']], [q1,med,q3] )
+        inside = x_[(x_ >= q1-whis*(q3-q1)) & (x_ <= q3+whis*(q3-q1))]
+        assert np.isclose ( s['wisk_lo'], inside.min() )
+        assert np.isclose ( s['wisk_hi'], inside.max() )
+        outside = np.sort ( x_[(x_ < inside.min()) | (x_ > inside.max())] )
+        assert np.array_equal ( np.r_[b['fliers'][0],b['fliers'][1]], outside )
+        assert s['n'] == len(x_)
+
+def test_batch_stats_equal_percentiles ():
+    x = groups ()
+    assert_stats_equal_percentiles (
+            *dvis.stats.batch_boxplot_stats ( x, whis=1.5 ), x=x )
+
+def test_batch_stats_ignore_nan ():
+    x = groups ()
+    padded = dvis.stats.pad_groups ( x )
+    assert padded.shape == (1000,4)
+    a = dvis.stats.batch_boxplot_stats ( padded )[0]
+    b = dvis.stats.batch_boxplot_stats ( x )[0]
+    assert np.array_equal ( a, b )
+
+def test_ragged_groups_are_not_padded_to_the_largest ():
+    rng = np.random.RandomState ( 5 )
+    x = [rng.standard_normal ( 10 ) for i in range ( 200 )]
+    x.insert ( 17, rng.standard_normal ( 100000 ) )
+    x.append ( np.array ( [1.,np.nan,2.,30.] ) )
+    buckets = dvis.stats._size_buckets ( x )
+    assert sorted ( sum ( buckets, [] ) ) == list ( range ( len(x) ) )
+    for index in buckets:
+        sizes = [len(x[i]) for i in index]
+        assert max ( sizes )*len(sizes) <= 2*sum ( sizes )
+    assert_stats_equal_percentiles ( *dvis.stats.batch_boxplot_stats ( x ), x=x )
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+    tracemalloc.start ()
+    try:
+        dvis.stats.batch_boxplot_stats ( x )
+        peak = tracemalloc.get_traced_memory ()[1]
+    finally:
+        tracemalloc.stop ()
+    assert peak < 8*sum ( [x_.nbytes for x_ in x] )
+
+def test_float32_keeps_its_dtype ():
+    x = np.random.RandomState ( 4 ).standard_normal ( (100,3) ).astype ( 'f' )
+    assert dvis.stats.pad_groups ( x ).dtype == np.float32
+    assert dvis.stats.pad_groups ( x ) is x
+    copy = dvis.stats.pad_groups ( x, copy=True )
+    assert copy.dtype == np.float32 and copy.flags.f_contiguous
+    assert not np.may_share_memory ( copy, x )
+    assert dvis.stats.pad_groups ( list ( x.T ) ).dtype == np.float32
+    assert dvis.stats.pad_groups ( x.astype ( int ) ).dtype == np.float64
+    stats,fliers = dvis.stats.batch_boxplot_stats ( x )
+    assert fliers.dtype == np.float32
+    assert np.allclose ( stats['med'], np.median ( x, 0 ) )
+
+@pytest.mark.parametrize ( 'eps', [0.01,0.002] )
+def test_sketch_rank_error_within_eps ( eps ):
+    rng = np.random.RandomState ( 2 )
+    x = rng.standard_normal ( 200000 )
+    sketch = dvis.stats.QuantileSketch ( eps, rng=0 )
+    for chunk in np.array_split ( x, 37 ):
+        sketch.update ( chunk )
+    q = np.linspace ( 0, 1, 21 )
+    ranks = np.searchsorted ( np.sort ( x ), sketch.quantile ( q ) )
+    assert sketch.n == len(x)
+    assert np.max ( np.abs ( ranks-q*(len(x)-1) ) ) <= eps*len(x)
+
+def test_weighted_stats_equal_repeated_values ():
+    rng = np.random.RandomState ( 1 )
+    values = rng.standard_normal ( 200 )
+    values[:3] *= 10
+    weights = rng.randint ( 0, 5, 200 )
+    weighted = dvis.stats.weighted_boxplot_stats ( values, weights )
+    stats,fliers = dvis.stats.batch_boxplot_stats ( np.repeat ( values, weights ) )
+    expected = dvis.stats.unpack_boxplot_stats ( stats, fliers )[0]
+    assert np.allclose ( weighted['main'], expected['main'] )
+    assert weighted['n'] == weights.sum()
+    for side in (0,1):
+        assert np.array_equal ( weighted['fliers'][side],
+                np.unique ( expected['fliers'][side] ) )
+
+def test_histogram_stats_equal_weighted_centers ():
+    counts = np.array ( [3,0,5,9,4,1] )
+    edges = np.arange ( 7. )
+    hist = dvis.stats.histogram_boxplot_stats ( counts, edges )
+    weighted = dvis.stats.weighted_boxplot_stats ( edges[:-1]+.5, counts )
+    assert np.allclose ( hist['main'], weighted['main'] )
+
+def test_histogram_percentiles_within_tol ():
+    rng = np.random.RandomState ( 3 )
+    x = rng.standard_normal ( 100000 )
+    p = [0,5,25,50,75,95,100]
+    approx = dvis.stats.percentiles ( x, p, method='histogram', tol=0.001 )
+    assert np.max ( np.abs ( approx-np.percentile ( x, p ) ) ) <= \
+            0.001*(x.max()-x.min())
+    assert np.allclose ( dvis.stats.percentiles ( x, p, method='partition' ),
+            np.percentile ( x, p ) )
+
+def test_binned_kde_matches_gaussian_sum ():
+    x = groups ()
+    grid,density,bw = dvis.stats.binned_kde ( x, ngrid=512 )
+    assert density.shape == (len(x),512)
+    for x_,d,h in zip ( x, density, bw ):
+        direct = np.exp ( -.5*((grid[:,None]-x_[None])/h)**2 ).sum ( 1 )/ \
+                (len(x_)*h*np.sqrt ( 2*np.pi ))
+        assert np.max ( np.abs ( d-direct ) ) <= 0.01*direct.max()
+        assert np.isclose ( d.sum()*(grid[1]-grid[0]), 1, atol=0.01 )
@@ -0,0 +1,93 @@
+"""Rendering dvis figures from several threads at once"""
+
+import io
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip ( 'matplotlib' )
+
+import dvis
+import dvis.customized
+
+def render ( seed, n=500 ):
+    """png bytes of a figure with all dvis entry points"""
+    rng = np.random.RandomState ( seed )
+    fig = dvis.agg_figure ( figsize=(4,6), dpi=40 )
+    axes = dvis.axes_grid ( (2,3), fig=fig )
+    x = rng.standard_normal ( n )
+    dvis.prepare_axes ( axes[0,1] )
+    dvis.Scatter ( x, x+rng.standard_normal ( n ), ax=axes[0,0],
+            c=dvis.luminancecode ( x, dvis.col3[seed%3] ) )
+    dvis.Boxplot ( rng.standard_normal ( (n,4) ), ax=axes[0,1], notch=1 )
+    t = np.arange ( n//10, dtype='d' )
+    y = np.cumsum ( rng.standard_normal ( len(t) ) )
+    dvis.Errorline ( t, y, .5, ax=axes[1,0], color=dvis.col4[seed%4] )
+    dvis.customized.Errorline_faded ( t, y, .5, np.linspace ( 1, 0, len(t) ),
+            ax=axes[1,1] )
+    dvis.Errorlines ( t, y+np.arange ( 3 )[:,None], .5, ax=axes[0,2] )
+    dvis.Errorline ( t, y[:,None]+rng.standard_normal ( (len(t),20) ),
+            ax=axes[1,2] )
+    buf = io.BytesIO ()
+    fig.savefig ( buf, format='png' )
+    return buf.getvalue ()
+
+def test_threads_render_like_serial ():
+    seeds = list ( range ( 6 ) )
+    serial = dict ( [(seed,render ( seed )) for seed in seeds] )
+    results = {}
+    errors = []
+
+    def work ( seed ):
+        try:
+            for repeat in range ( 3 ):
+                results[(seed,repeat)] = render ( seed )
+        except Exception as error:
+            errors.append ( error )
+
+    threads = [threading.Thread ( target=work, args=(seed,) ) for seed in seeds]
+    for thread in threads:
+        thread.start ()
+    for thread in threads:
+        thread.join ()
+
+    assert errors == []
+    assert len(results) == 3*len(seeds)
+    for (seed,repeat),image in results.items():
+        assert image == serial[seed]
+
+def test_pyplot_is_not_imported ():
+    # Other tests may have imported pyplot into this process
+    here = os.path.dirname ( os.path.abspath ( __file__ ) )
+    path = [here,os.path.dirname ( here ),os.environ.get ( 'PYTHONPATH', '' )]
+    script = "import sys, test_threads\n" \
+            "test_threads.render ( 0 )\n" \
+            "sys.exit ( 'matplotlib.pyplot' in sys.modules )\n"
+    subprocess.check_call ( [sys.executable,'-c',script],
+            env=dict ( os.environ, PYTHONPATH=os.pathsep.join ( path ) ) )
+
+def test_render_spec_in_threads ():
+    import dvis.batch
+    spec = {'size':(3,2), 'dpi':40, 'grid':(2,1),
+            'plots':[{'axes':(0,0), 'kind':'Boxplot',
+                      'args':(np.arange ( 40. ).reshape ( (10,4) ),)},
+                     {'axes':(1,0), 'kind':'plot', 'args':([0,1],[1,0])}]}
+    expected = dvis.batch.render_spec ( spec )
+    results = []
+
+    def work ():
+        for repeat in range ( 3 ):
+            results.append ( dvis.batch.render_spec ( spec ) )
+
+    threads = [threading.Thread ( target=work ) for i in range ( 4 )]
+    for thread in threads:
+        thread.start ()
+    for thread in threads:
+        thread.join ()
+
+    assert len(results) == 12
+    assert all ( [image == expected for image in results] )